@@ -1,12 +1,16 @@
+import os
 import socket
-import struct
+import sys
 import cv2
-import numpy as np
 import threading
 import time
 from flask import Flask, render_template_string, jsonify, redirect, Response
 import requests
 
+# Shared TCP framing helpers live next to the full YOLO server
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "TCP Object Detection"))
+from frame_reader import FrameReader, decode_frame
+
 app = Flask(__name__)
 
 # ESP32-CAM endpoints
@@ -24,25 +28,17 @@ def tcp_receiver():
     sock = socket.socket()
     print(f"Connecting to ESP32 TCP stream at {ESP32_IP}:{ESP32_PORT}...")
     sock.connect((ESP32_IP, ESP32_PORT))
+    reader = FrameReader(sock)
 
     try:
         while running:
-            # Read 4-byte frame size
-            header = sock.recv(4)
-            if not header:
+            # Read one length-prefixed frame into the reader's reusable buffer
+            frame_data = reader.read_frame()
+            if frame_data is None:
                 break
-            frame_size = struct.unpack('<I', header)[0]
-
-            # Read frame data
-            frame_data = b''
-            while len(frame_data) < frame_size:
-                chunk = sock.recv(frame_size - len(frame_data))
-                if not chunk:
-                    break
-                frame_data += chunk
 
             # Decode JPEG to NumPy image
-            img = cv2.imdecode(np.frombuffer(frame_data, np.uint8), cv2.IMREAD_COLOR)
+            img = decode_frame(frame_data)
             if img is not None:
                 latest_frame = img
 
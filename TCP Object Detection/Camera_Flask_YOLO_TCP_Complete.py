@@ -526,7 +526,6 @@
 
 
 import socket
-import struct
 import cv2
 import numpy as np
 import threading
@@ -535,9 +534,16 @@ import requests
 import os
 import yaml
 import asyncio
-import math
-from ultralytics import YOLO
-from flask import Flask, render_template_string, jsonify, Response
+from flask import Flask, render_template_string, jsonify, Response, request
+from frame_reader import FrameReader, ScaledDecoder, scale_box
+from stream_pipeline import LatestSlot, StageStats
+from mjpeg_broadcaster import MJPEGBroadcaster
+from inference_worker import InferenceWorker
+from model_service import load_model
+from selection import POLICIES, select_detection
+from roi import detect_roi
+from overlay import OverlayCompositor
+from tracing import FrameTracer
 
 app = Flask(__name__)
 
@@ -555,18 +561,28 @@ with open(CONFIG_PATH, "r") as f:
 
 # ----------------------------
 # YOLO MODEL SETUP
+# Shared service if config.model_service is set, else a process-wide model that
+# warms up in the background while the server starts
 # ----------------------------
-yolo_model_path = os.path.join(SCRIPT_DIR, config.get("yolo_model", "yolo11n.pt"))
 imgsz = config.get("imgsz", 640)
 conf = config.get("conf", 0.25)
 classes = config.get("classes", [39, 63, 66, 67, 76])
-model = YOLO(yolo_model_path)
+selection_policy = config.get("selection_policy", "closest_to_center")
+if selection_policy not in POLICIES:
+    raise ValueError(f"Unknown selection_policy {selection_policy!r}; expected one of {', '.join(POLICIES)}")
+roi = config.get("roi") or {}
+ROI_ENABLED = roi.get("enabled", False)
+ROI_SIZE = roi.get("size", 320)
+ROI_GROWTH = roi.get("growth", 2.0)
+ROI_IMGSZ = roi.get("imgsz", ROI_SIZE)
+model = load_model(config, SCRIPT_DIR)
 
 highlight_box = None
 highlight_label = None
 highlight_conf = None
 highlight_duration = 0
 current_commands_text = ["Press SPACE to detect"]
+detection_seq = None  # frame id of the latest detection, for tracing command dispatch
 
 # ----------------------------
 # LOAD COMMAND MAPPINGS
@@ -580,10 +596,12 @@ with open(COMMANDS_PATH, "r") as f:
 # ----------------------------
 # ASYNC COMMAND SENDER
 # ----------------------------
-async def send_command_async(object_name: str, command: str):
+async def send_command_async(object_name: str, command: str, frame_seq=None):
+    """frame_seq: the frame the detection came from, traced as its command dispatch."""
     print(f"Sending command to {object_name}: {command}")
     await asyncio.sleep(0.2)
     print(f"Command '{command}' sent to {object_name}'")
+    tracer.mark(frame_seq, "command")
 
 def run_asyncio_task(coro):
     threading.Thread(target=lambda: asyncio.run(coro), daemon=True).start()
@@ -591,38 +609,19 @@ def run_asyncio_task(coro):
 # ----------------------------
 # YOLO DETECTION FUNCTION
 # ----------------------------
-def detect_and_highlight(frame):
-    global highlight_box, highlight_label, highlight_conf, highlight_duration, current_commands_text, latest_frame
-
+def find_closest_object(frame):
+    """Run YOLO on frame; return (box, label, conf) of the detection chosen by selection_policy."""
+    if ROI_ENABLED:
+        return detect_roi(model, frame, ROI_SIZE, ROI_GROWTH, selection_policy,
+                          roi_imgsz=ROI_IMGSZ, classes=classes, imgsz=imgsz, conf=conf, verbose=False)
     results = model.predict(frame, classes=classes, imgsz=imgsz, conf=conf, verbose=False)
-    h, w = frame.shape[:2]
-    frame_center = (w // 2, h // 2)
-
-    closest_box = None
-    closest_label = None
-    closest_conf = None
-    closest_distance = float("inf")
-
-    for r in results:
-        for box in r.boxes:
-            cls = int(box.cls[0])
-            label = r.names[cls]
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            obj_center = ((x1 + x2) // 2, (y1 + y2) // 2)
-            dist = math.dist(obj_center, frame_center)
-            if dist < closest_distance:
-                closest_box = (x1, y1, x2, y2)
-                closest_label = label
-                closest_conf = float(box.conf[0])
-                closest_distance = dist
+    return select_detection(results, frame.shape, selection_policy)
 
-    if closest_box:
-        x1, y1, x2, y2 = closest_box
-        cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 3)
-        label_text = f"{closest_label} {closest_conf:.2f}"
-        cv2.putText(frame, label_text, (x1, y1 - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+def apply_detection(closest_box, closest_label, closest_conf):
+    """Publish a detection to the overlay globals and the command panel."""
+    global highlight_box, highlight_label, highlight_conf, highlight_duration, current_commands_text
 
+    if closest_box:
         highlight_box = closest_box
         highlight_label = closest_label
         highlight_conf = closest_conf
@@ -639,95 +638,118 @@ def detect_and_highlight(frame):
     else:
         current_commands_text = ["No detection"]
 
-    return frame
+def detect_and_highlight(frame, scale=1):
+    """scale maps the frame back to camera resolution (see ScaledDecoder)."""
+    closest_box, closest_label, closest_conf = find_closest_object(frame)
+    apply_detection(scale_box(closest_box, scale), closest_label, closest_conf)
 
 # ----------------------------
 # DETECTION WRAPPER
 # ----------------------------
-def run_detection_async(frame):
-    global latest_frame
-    result_frame = detect_and_highlight(frame)
-    latest_frame = result_frame
+def run_detection_async(frame, scale=1, frame_seq=None):
+    global detection_seq
+    tracer.mark(frame_seq, "inference_start")
+    detect_and_highlight(frame, scale)
+    tracer.mark(frame_seq, "inference_end")
+    detection_seq = frame_seq
 
 # ----------------------------
 # COMMAND PANEL OVERLAY
 # ----------------------------
-def draw_commands_panel(frame, text_lines):
-    panel_height = 150
-    width = frame.shape[1]
-    panel = np.zeros((panel_height, width, 3), dtype=np.uint8)
-    font = cv2.FONT_HERSHEY_SIMPLEX
-    font_scale = 0.6
-    color = (255, 255, 255)
-    line_height = 25
-    y0 = 25
-    for i, line in enumerate(text_lines):
-        y = y0 + i * line_height
-        cv2.putText(panel, line, (10, y), font, font_scale, color, 1, cv2.LINE_AA)
-    combined = np.vstack((frame, panel))
-    return combined
+# Frame + command panel share one preallocated canvas; the panel is only
+# re-rendered when current_commands_text changes
+compositor = OverlayCompositor(panel_height=150)
 
 # =============================================================
 
-ESP32_IP = '192.168.0.164'
-ESP32_PORT = 12345
+ESP32_IP = config.get("esp32_tcp_ip", '192.168.0.164')
+ESP32_PORT = config.get("esp32_tcp_port", 12345)
 
-latest_frame = None
 streaming_active = False
 tcp_thread = None
+decode_thread = None
+render_thread = None
 yolo_thread = None
 sock = None
-current_fps = 0.0
+frame_reader = None
+broadcaster = MJPEGBroadcaster()
+
+# Receive, decode and render run on separate threads joined by single-slot
+# buffers, so a slow decode/draw drops stale frames instead of stalling the socket
+raw_frames = LatestSlot()       # (captured_at, jpeg_bytes)
+decoded_frames = LatestSlot()   # (captured_at, image, decode scale, frame_seq)
+stage_stats = {"receive": StageStats(), "decode": StageStats(), "render": StageStats(), "passthrough": StageStats()}
+
+# Per-frame stage timestamps keyed by the raw_frames sequence number (/metrics, /trace)
+tracer = FrameTracer(config.get("trace_capacity", 1024))
+
+# Passthrough: with no overlay to draw, forward the camera's own JPEG untouched
+# and skip decode, render and re-encode entirely. Off by default: idle frames
+# then lack the command panel, center dot and "Press SPACE" hint, so the stream
+# height alternates between the camera frame and frame + panel.
+PASSTHROUGH = config.get("passthrough", False)
+
+def overlay_active():
+    return highlight_box is not None and highlight_duration > 0
+
+# Reduced-size JPEG decode: preview frames only need preview_width pixels and
+# inference frames only imgsz (full size with ROI, whose crops are in camera
+# pixels). highlight_box is kept in camera coordinates.
+preview_decoder = ScaledDecoder(config.get("preview_width"))
+inference_decoder = ScaledDecoder(None if ROI_ENABLED else imgsz)
+
+# Continuous detection: one long-lived worker infers on the newest received JPEG
+# (decoding only the frames it actually uses) at up to DETECTION_FPS
+CONTINUOUS_DETECTION = config.get("continuous_detection", False)
+DETECTION_FPS = config.get("detection_fps", 5)
+
+def detect_jpeg(frame_data):
+    img, scale = inference_decoder.decode(frame_data)
+    if img is None:
+        return None, None, None
+    box, label, conf = find_closest_object(img)
+    return scale_box(box, scale), label, conf
+
+def on_detection(result):
+    global detection_seq
+    tracer.mark(result.frame_seq, "inference_start", result.finished_at - result.inference_ms / 1000)
+    tracer.mark(result.frame_seq, "inference_end", result.finished_at)
+    detection_seq = result.frame_seq
+    apply_detection(*result.value)
+
+inference_worker = InferenceWorker(detect_jpeg, DETECTION_FPS, on_result=on_detection)
+
+def detection_frame():
+    """Decode the newest received JPEG for detection (clean, without overlays); (image, scale, frame_seq) or None."""
+    frame_seq, item = raw_frames.peek()
+    if item is None:
+        return None
+    img, scale = inference_decoder.decode(item[1])
+    if img is None:
+        return None
+    return img, scale, frame_seq
 
 # ----------------------------
-# TCP receiver thread
+# TCP receiver thread: only drains the socket
 # ----------------------------
 def tcp_receiver():
-    global latest_frame, streaming_active, sock, current_commands_text 
-    global highlight_box, highlight_label, highlight_conf, highlight_duration
-    global yolo_thread
+    global streaming_active, sock, frame_reader
     try:
         sock = socket.socket()
         print(f"Connecting to ESP32 TCP stream at {ESP32_IP}:{ESP32_PORT}...")
         sock.connect((ESP32_IP, ESP32_PORT))
+        frame_reader = FrameReader(sock)
 
         while streaming_active:
-            header = sock.recv(4)
-            if not header:
+            started = time.perf_counter()
+            frame_data = frame_reader.read_frame()
+            if frame_data is None:
                 break
-            frame_size = struct.unpack('<I', header)[0]
-
-            frame_data = b''
-            while len(frame_data) < frame_size:
-                chunk = sock.recv(frame_size - len(frame_data))
-                if not chunk:
-                    break
-                frame_data += chunk
-
-            img = cv2.imdecode(np.frombuffer(frame_data, np.uint8), cv2.IMREAD_COLOR)
-            height, width = img.shape[:2]
-            frame_center = (width // 2, height // 2)
-            cv2.circle(img, frame_center, 5, (0, 0, 255), -1)
-
-            if highlight_box and highlight_label and highlight_duration > 0:
-                x1, y1, x2, y2 = highlight_box
-                cv2.rectangle(img, (x1, y1), (x2, y2), (255, 0, 0), 3)
-                label_text = f"{highlight_label} {highlight_conf:.2f}"
-                cv2.putText(img, label_text, (x1, y1 - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                highlight_duration -= 1
-                if highlight_duration == 0:
-                    highlight_box = None
-                    highlight_label = None
-                    highlight_conf = None
-            else:
-                cv2.putText(img, "Press SPACE to detect", (10, 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-
-            if img is not None:
-                temp_img = img.copy()
-                combined_frame = draw_commands_panel(temp_img, current_commands_text)
-                latest_frame = combined_frame
+            # The reader reuses its buffer, so hand the next stage its own copy
+            captured = time.perf_counter()
+            tracer.begin(raw_frames.seq + 1, captured)  # this thread is the only producer
+            raw_frames.put((captured, bytes(frame_data)))
+            stage_stats["receive"].add(started, captured, captured)
 
     except Exception as e:
         print(f"TCP Receiver Error: {e}")
@@ -742,29 +764,73 @@ def tcp_receiver():
             print("Disconnected from ESP32")
 
 # ----------------------------
-# MJPEG generator with FPS
+# Decode thread: newest JPEG -> image (or straight to clients in passthrough)
 # ----------------------------
-def mjpeg_generator():
-    global latest_frame, current_fps
-    frame_count = 0
-    start_time = time.time()
-
-    while True:
-        if latest_frame is not None:
-            ret, jpeg = cv2.imencode('.jpg', latest_frame)
-            if ret:
-                frame_bytes = jpeg.tobytes()
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-                frame_count += 1
-
-                elapsed = time.time() - start_time
-                if elapsed >= 1.0:
-                    current_fps = frame_count / elapsed
-                    frame_count = 0
-                    start_time = time.time()
+def frame_decoder():
+    while streaming_active:
+        item = raw_frames.get(timeout=0.5)
+        if item is None:
+            continue
+        frame_seq, (captured, frame_data) = item
+        started = time.perf_counter()
+        if CONTINUOUS_DETECTION:
+            inference_worker.submit(frame_seq, frame_data)
+        if PASSTHROUGH and not overlay_active():
+            broadcaster.publish_jpeg(frame_data, frame_seq)
+            stage_stats["passthrough"].add(started, time.perf_counter(), captured)
+            continue
+
+        img, scale = preview_decoder.decode(frame_data)
+        if img is None:
+            continue
+        tracer.mark(frame_seq, "decode")
+        decoded_frames.put((captured, img, scale, frame_seq))
+        stage_stats["decode"].add(started, time.perf_counter(), captured)
+
+# ----------------------------
+# Render thread: overlays + command panel on the newest image
+# ----------------------------
+def frame_renderer():
+    global highlight_box, highlight_label, highlight_conf, highlight_duration
+    while streaming_active:
+        item = decoded_frames.get(timeout=0.5)
+        if item is None:
+            continue
+        _, (captured, decoded, scale, frame_seq) = item
+        started = time.perf_counter()
+
+        img = compositor.compose(decoded, current_commands_text)
+        height, width = img.shape[:2]
+        frame_center = (width // 2, height // 2)
+        cv2.circle(img, frame_center, 5, (0, 0, 255), -1)
+
+        if highlight_box and highlight_label and highlight_duration > 0:
+            x1, y1, x2, y2 = scale_box(highlight_box, 1 / scale)
+            cv2.rectangle(img, (x1, y1), (x2, y2), (255, 0, 0), 3)
+            label_text = f"{highlight_label} {highlight_conf:.2f}"
+            cv2.putText(img, label_text, (x1, y1 - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+            highlight_duration -= 1
+            if highlight_duration == 0:
+                highlight_box = None
+                highlight_label = None
+                highlight_conf = None
         else:
-            time.sleep(0.01)
+            cv2.putText(img, "Press SPACE to detect", (10, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+
+        combined_frame = compositor.canvas
+        tracer.mark(frame_seq, "overlay")
+        broadcaster.publish(combined_frame, frame_seq)
+        tracer.mark(frame_seq, "encode")
+        stage_stats["render"].add(started, time.perf_counter(), captured)
+
+# ----------------------------
+# MJPEG output: one encode per rendered frame, shared by all clients
+# ----------------------------
+def mjpeg_generator():
+    # With several viewers, "send" is the first client the frame went out to
+    return broadcaster.stream(on_send=lambda frame_seq: tracer.mark(frame_seq, "send", first=True))
 
 # ----------------------------
 # Flask routes
@@ -842,42 +908,83 @@ def video_feed():
 
 @app.route('/fps')
 def get_fps():
-    return jsonify(fps=current_fps)
+    receiver = frame_reader.stats.as_dict() if frame_reader else None
+    stages = {name: stats.as_dict() for name, stats in stage_stats.items()}
+    stages["decode"]["dropped"] = raw_frames.dropped
+    stages["render"]["dropped"] = decoded_frames.dropped
+    inference = inference_worker.as_dict() if CONTINUOUS_DETECTION else None
+    return jsonify(fps=broadcaster.stats.fps, receiver=receiver, stages=stages, inference=inference)
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text format: per-stage latency quantiles plus stream FPS."""
+    text = tracer.prometheus()
+    text += "# HELP camera_stream_fps Frames per second sent to /video_feed clients.\n"
+    text += "# TYPE camera_stream_fps gauge\n"
+    text += f"camera_stream_fps {broadcaster.stats.fps:.3f}\n"
+    return Response(text, mimetype='text/plain; version=0.0.4')
+
+@app.route('/trace')
+def trace():
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify(stages=tracer.summary(), recent=tracer.recent(limit))
+
+@app.route('/send_command/<key>')
+def send_command(key):
+    """Dispatch command `key` (as listed in the panel) for the highlighted object."""
+    label = highlight_label
+    cmd = OBJECT_COMMANDS.get(label, {}).get(key) if label else None
+    if cmd is None:
+        return jsonify(status='no_command'), 404
+    run_asyncio_task(send_command_async(label, cmd, detection_seq))
+    return jsonify(status='command_sent', object=label, command=cmd)
 
 @app.route('/start_stream')
 def start_stream():
-    global streaming_active, tcp_thread
+    global streaming_active, tcp_thread, decode_thread, render_thread
     if not streaming_active:
         streaming_active = True
+        raw_frames.clear()
+        decoded_frames.clear()
         tcp_thread = threading.Thread(target=tcp_receiver, daemon=True)
+        decode_thread = threading.Thread(target=frame_decoder, daemon=True)
+        render_thread = threading.Thread(target=frame_renderer, daemon=True)
         tcp_thread.start()
+        decode_thread.start()
+        render_thread.start()
+        if CONTINUOUS_DETECTION:
+            inference_worker.start()
         print("Stream started.")
     return jsonify(status='started')
 
 @app.route('/stop_stream')
 def stop_stream():
     global streaming_active, sock, tcp_thread
-    if (tcp_thread and tcp_thread.is_alive()) or (yolo_thread and yolo_thread.is_alive()):
+    threads = [t for t in (tcp_thread, decode_thread, render_thread, yolo_thread) if t and t.is_alive()]
+    if threads:
         print("[INFO] Waiting for previous stream thread to end...")
         streaming_active = False
-        tcp_thread.join()
-        yolo_thread.join()
         if sock:
+            # Unblocks the receiver if it is waiting in recv_into
             try:
                 sock.shutdown(socket.SHUT_RDWR)
-                sock.close()
             except:
                 pass
+        for t in threads:
+            t.join()
+    inference_worker.stop()
+    streaming_active = False
     sock = None
     print("Stream stopped.")
     return jsonify(status='stopped')
 
 @app.route('/trigger_detection')
 def trigger_detection():
-    global latest_frame, yolo_thread
-    if latest_frame is not None:
+    global yolo_thread
+    detection = detection_frame()
+    if detection is not None:
         print("Triggered detection from webpage")
-        yolo_thread = threading.Thread(target=run_detection_async, args=(latest_frame.copy(),), daemon=True)
+        yolo_thread = threading.Thread(target=run_detection_async, args=detection, daemon=True)
         yolo_thread.start()
         return jsonify(status='detection_triggered')
     else:
@@ -0,0 +1,230 @@
+import socket
+import threading
+import time
+from collections import deque
+from frame_reader import FrameReader, RateCounter, decode_frame
+
+# ----------------------------
+# Batched inference for several cameras on one host
+#
+# Every camera keeps only its newest pending frame. A tick starts when the
+# first frame arrives and closes at max_wait later (or earlier, once every
+# camera has a frame or max_batch frames are pending); all frames collected
+# by then go through one model.predict([...]) call and each result is routed
+# back to its camera. When more cameras are pending than max_batch, the
+# starting camera rotates every tick so none of them is starved.
+# ----------------------------
+
+
+class CameraStats:
+    """Per-camera counters and latencies (seconds internally, ms in as_dict)."""
+    def __init__(self, window=60):
+        self.rate = RateCounter()
+        self.submitted = 0
+        self.dropped = 0
+        self._wait = deque(maxlen=window)
+        self._latency = deque(maxlen=window)
+
+    def add(self, submitted_at, batch_started, finished, captured):
+        self.rate.add()
+        self._wait.append(batch_started - submitted_at)
+        self._latency.append(finished - captured)
+
+    def as_dict(self):
+        wait = list(self._wait)
+        latency = list(self._latency)
+        return {
+            "fps": self.rate.fps,
+            "submitted": self.submitted,
+            "inferred": self.rate.total_frames,
+            "dropped": self.dropped,
+            "queue_wait_ms": 1000 * sum(wait) / len(wait) if wait else 0.0,
+            "latency_ms": 1000 * sum(latency) / len(latency) if latency else 0.0,
+            "max_latency_ms": 1000 * max(latency) if latency else 0.0,
+        }
+
+
+class BatchScheduler:
+    """
+    Collects frames from N cameras into deadline-bounded batches for one model.
+    on_result(camera, frame, result) is called on the scheduler thread for each
+    frame of a batch, with the ultralytics result belonging to that frame.
+    """
+    def __init__(self, model, max_batch=4, max_wait=0.05, on_result=None, **predict_kwargs):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.on_result = on_result
+        self.predict_kwargs = predict_kwargs
+        self.cameras = {}
+        self.batch_sizes = deque(maxlen=60)
+        self.batch_ms = deque(maxlen=60)
+        self._pending = {}   # camera -> (frame, captured, submitted_at)
+        self._order = []
+        self._next = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def add_camera(self, camera):
+        with self._cond:
+            if camera not in self.cameras:
+                self.cameras[camera] = CameraStats()
+                self._order.append(camera)
+
+    def submit(self, camera, frame, captured=None):
+        """Queue camera's newest frame; replaces one that has not been batched yet."""
+        now = time.perf_counter()
+        with self._cond:
+            stats = self.cameras[camera]
+            stats.submitted += 1
+            if camera in self._pending:
+                stats.dropped += 1
+            self._pending[camera] = (frame, captured if captured is not None else now, now)
+            self._cond.notify_all()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="BatchScheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _collect(self):
+        """Wait for the next batch: [(camera, frame, captured, submitted_at)], or [] when stopping."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._pending or not self._running):
+                return []
+            if not self._running:
+                return []
+            deadline = min(item[2] for item in self._pending.values()) + self.max_wait
+            full = lambda: len(self._pending) >= min(self.max_batch, len(self.cameras))
+            while self._running and not full():
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # Round-robin over cameras so the same ones are not always first in line
+            n = len(self._order)
+            ordered = [self._order[(self._next + i) % n] for i in range(n)]
+            batch = []
+            for camera in ordered:
+                if camera in self._pending and len(batch) < self.max_batch:
+                    frame, captured, submitted_at = self._pending.pop(camera)
+                    batch.append((camera, frame, captured, submitted_at))
+            self._next = (self._next + 1) % n
+            return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._collect()
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                results = self.model.predict([frame for _, frame, _, _ in batch], **self.predict_kwargs)
+            except Exception as e:
+                print(f"⚠️ Batch inference error: {e}")
+                continue
+            finished = time.perf_counter()
+            self.batch_sizes.append(len(batch))
+            self.batch_ms.append(1000 * (finished - started))
+
+            for (camera, frame, captured, submitted_at), result in zip(batch, results):
+                self.cameras[camera].add(submitted_at, started, finished, captured)
+                if self.on_result:
+                    self.on_result(camera, frame, result)
+
+    def as_dict(self):
+        sizes = list(self.batch_sizes)
+        durations = list(self.batch_ms)
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": 1000 * self.max_wait,
+            "avg_batch_size": sum(sizes) / len(sizes) if sizes else 0.0,
+            "avg_batch_ms": sum(durations) / len(durations) if durations else 0.0,
+            "cameras": {camera: stats.as_dict() for camera, stats in self.cameras.items()},
+        }
+
+
+# ----------------------------
+# Headless multi-camera detection: one TCP receiver per camera in
+# config.yaml `cameras`, all feeding a single BatchScheduler
+# ----------------------------
+def camera_receiver(scheduler, camera, ip, port, running):
+    while running.is_set():
+        try:
+            with socket.create_connection((ip, port), timeout=5) as sock:
+                sock.settimeout(None)
+                print(f"✅ [{camera}] connected to {ip}:{port}")
+                for frame_data in FrameReader(sock):
+                    captured = time.perf_counter()
+                    img = decode_frame(frame_data)
+                    if img is not None:
+                        scheduler.submit(camera, img, captured)
+                    if not running.is_set():
+                        return
+        except Exception as e:
+            print(f"⚠️ [{camera}] {e}")
+        time.sleep(1.0)
+
+
+if __name__ == "__main__":
+    import json
+    import os
+    import yaml
+    from model_service import load_model
+    from selection import select_detection
+
+    SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(SCRIPT_DIR, "config.yaml"), "r") as f:
+        config = yaml.safe_load(f)
+    cameras = config.get("cameras") or []
+    if not cameras:
+        raise SystemExit("No cameras configured (config.yaml `cameras`)")
+
+    selection_policy = config.get("selection_policy", "closest_to_center")
+    last_labels = {}
+
+    def report(camera, frame, result):
+        _, label, conf = select_detection([result], frame.shape, selection_policy)
+        if label != last_labels.get(camera):
+            last_labels[camera] = label
+            print(f"[{camera}] {label} {conf:.2f}" if label else f"[{camera}] No detection")
+
+    batching = config.get("batching") or {}
+    scheduler = BatchScheduler(
+        load_model(config, SCRIPT_DIR),
+        max_batch=batching.get("max_batch", len(cameras)),
+        max_wait=batching.get("max_wait_ms", 50) / 1000,
+        on_result=report,
+        classes=config.get("classes", [39, 63, 66, 67, 76]),
+        imgsz=config.get("imgsz", 640),
+        conf=config.get("conf", 0.25),
+        verbose=False,
+    )
+    running = threading.Event()
+    running.set()
+    for cam in cameras:
+        scheduler.add_camera(cam["name"])
+        threading.Thread(target=camera_receiver, args=(scheduler, cam["name"], cam["ip"], cam.get("port", 12345), running),
+                         daemon=True).start()
+    scheduler.start()
+
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(scheduler.as_dict(), indent=2))
+    except KeyboardInterrupt:
+        running.clear()
+        scheduler.stop()
@@ -3,12 +3,14 @@
 import cv2
 from PIL import Image
 
-from ultralytics import YOLO
+from frame_reader import decode_frame
+from frame_source import open_source
+from model_service import get_model
 
 # Models: all versions have n, s, m, l, x sizes. On CPU, only n is fast enough; other sizes are too slow (need a GPU).
 # Changing the model is super easy, just change the model name below. It AUTO DOWNLOADS the model if it's missing.
 # List of models: https://docs.ultralytics.com/models/
-model = YOLO("Object_Detection/yolo11n.pt")
+model = get_model("Object_Detection/yolo11n.pt")
 
 # =============================
 # New addition from modified CameraWebServer code
@@ -24,4 +26,17 @@ except Exception as e:
 ip_stream_url = "http://192.168.0.153/stream"     # check Arduino IDE Serial Monitor for your url
 # accepts all formats - image/dir/Path/URL/video/PIL/ndarray. 0 for webcam
 # results = model.predict(source="0", show=True)
-results = model.predict(source=ip_stream_url, show=True)
+# Read the stream ourselves (newest frame only) instead of through OpenCV's buffered URL capture
+cap = open_source(ip_stream_url)
+cap.start()
+while True:
+    item = cap.read(timeout=1.0)
+    if item is not None:
+        frame = decode_frame(item[0])
+        if frame is not None:
+            results = model.predict(source=frame, verbose=False)
+            cv2.imshow("YOLO", results[0].plot())
+    if cv2.waitKey(1) & 0xFF == ord('q'):
+        break
+cap.stop()
+cv2.destroyAllWindows()
@@ -0,0 +1,236 @@
+import argparse
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+import numpy as np
+from frame_reader import FRAME_HEADER, RateCounter
+
+# ----------------------------
+# Local stand-in for the ESP32-CAM, speaking both of its protocols:
+#   HTTP (CameraWebServer):      /start_preview, /stop_preview, /stream (MJPEG, 403 until started)
+#   TCP  (CameraTCPConnection):  port 12345, 4-byte little-endian size + JPEG, streams on connect
+#
+#   python esp32_simulator.py --fps 30 --width 640 --height 480 --quality 80
+#   python esp32_simulator.py --source clip.mp4      (replay recorded footage instead)
+#
+# then point config.yaml ip_stream_url at http://127.0.0.1:8080 and esp32_tcp_ip at 127.0.0.1.
+# ----------------------------
+
+
+class SimulatedCamera:
+    """
+    Produces JPEG frames at fps on its own thread, like the camera's frame
+    buffer: clients always get the newest frame and never queue old ones.
+    Frames are synthetic (moving shapes + frame counter) unless a FrameSource
+    is given, in which case its JPEGs are served as-is.
+    """
+    def __init__(self, width=640, height=480, fps=30.0, jpeg_quality=80, source=None):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)]
+        self.source = source
+        self.stats = RateCounter()
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._jpeg = None
+        self._running = False
+        self._background = np.dstack([
+            np.tile(np.linspace(40, 200, width, dtype=np.uint8), (height, 1)),
+            np.tile(np.linspace(60, 160, height, dtype=np.uint8)[:, None], (1, width)),
+            np.full((height, width), 90, np.uint8),
+        ])
+
+    def _synthetic(self, i):
+        img = self._background.copy()
+        t = i / self.fps
+        cx = int(self.width / 2 + self.width / 4 * np.sin(t))
+        cy = int(self.height / 2 + self.height / 4 * np.cos(0.7 * t))
+        cv2.rectangle(img, (cx - 60, cy - 40), (cx + 60, cy + 40), (30, 30, 220), -1)
+        cv2.circle(img, (self.width - cx, cy), 35, (40, 200, 40), -1)
+        cv2.putText(img, f"SIM {i}", (10, self.height - 15), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        ok, jpeg = cv2.imencode('.jpg', img, self.encode_params)
+        return jpeg.tobytes()
+
+    def _run(self):
+        frames = iter(self.source) if self.source else None
+        interval = 1.0 / self.fps
+        next_at = time.perf_counter()
+        i = 0
+        while self._running:
+            if frames:
+                item = next(frames, None)
+                if item is None:
+                    print("Source exhausted, camera stopped")
+                    return
+                jpeg, _ = item
+            else:
+                jpeg = self._synthetic(i)
+                next_at += interval
+                time.sleep(max(0.0, next_at - time.perf_counter()))
+            with self._cond:
+                self._seq += 1
+                self._jpeg = jpeg
+                self._cond.notify_all()
+            self.stats.add(len(jpeg))
+            i += 1
+
+    def start(self):
+        self._running = True
+        threading.Thread(target=self._run, name="SimulatedCamera", daemon=True).start()
+
+    def stop(self):
+        self._running = False
+        if self.source:
+            self.source.stop()
+
+    def wait(self, last_seq, timeout=1.0):
+        """Newest (seq, jpeg) after last_seq, or None on timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > last_seq, timeout):
+                return None
+            return self._seq, self._jpeg
+
+
+# ----------------------------
+# HTTP: CameraWebServer endpoints
+# ----------------------------
+class ESP32HTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "esp32-simulator"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_text(self, status, text):
+        body = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data):
+        self.wfile.write(b"%x\r\n" % len(data))
+        self.wfile.write(data)
+        self.wfile.write(b"\r\n")
+
+    def do_GET(self):
+        sim = self.server.simulator
+        if self.path == "/start_preview":
+            sim.stream_active = True
+            self._send_text(200, "Preview started")
+        elif self.path == "/stop_preview":
+            sim.stream_active = False
+            self._send_text(200, "Preview stopped")
+        elif self.path == "/stream":
+            if not sim.stream_active:
+                self._send_text(403, "Stream not active")
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            last_seq = 0
+            try:
+                while sim.stream_active:
+                    item = sim.camera.wait(last_seq)
+                    if item is None:
+                        continue
+                    last_seq, jpeg = item
+                    self._chunk(b"--frame\r\n")
+                    self._chunk(b"Content-Type: image/jpeg\r\n\r\n")
+                    self._chunk(jpeg)
+                    self._chunk(b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+            except OSError:
+                pass
+        else:
+            self._send_text(404, "Not found")
+
+
+# ----------------------------
+# TCP: CameraTCPConnection length-prefixed stream
+# ----------------------------
+class ESP32TCPHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        camera = self.server.simulator.camera
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        print(f"[TCP] Client connected: {self.client_address[0]}")
+        last_seq = 0
+        try:
+            while True:
+                item = camera.wait(last_seq)
+                if item is None:
+                    continue
+                last_seq, jpeg = item
+                self.request.sendall(FRAME_HEADER.pack(len(jpeg)))
+                self.request.sendall(jpeg)
+        except OSError:
+            pass
+        print(f"[TCP] Client disconnected: {self.client_address[0]}")
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ESP32Simulator:
+    def __init__(self, camera, host="127.0.0.1", http_port=8080, tcp_port=12345):
+        self.camera = camera
+        self.stream_active = False
+        self.http = ThreadingHTTPServer((host, http_port), ESP32HTTPHandler)
+        self.http.simulator = self
+        self.tcp = _TCPServer((host, tcp_port), ESP32TCPHandler)
+        self.tcp.simulator = self
+
+    def start(self):
+        self.camera.start()
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+        threading.Thread(target=self.tcp.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.stream_active = False
+        self.http.shutdown()
+        self.tcp.shutdown()
+        self.http.server_close()
+        self.tcp.server_close()
+        self.camera.stop()
+
+
+if __name__ == "__main__":
+    from frame_source import FileFrameSource
+
+    parser = argparse.ArgumentParser(description="Simulate the ESP32-CAM HTTP and TCP streams locally")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--http-port", type=int, default=8080)
+    parser.add_argument("--tcp-port", type=int, default=12345)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--width", type=int, help="frame width (default 640); --source frames are resized when given")
+    parser.add_argument("--height", type=int, help="frame height (default 480); --source frames are resized when given")
+    parser.add_argument("--quality", type=int, default=80, help="JPEG quality 1-100")
+    parser.add_argument("--source", help="video file or image directory to replay instead of synthetic frames")
+    args = parser.parse_args()
+
+    width, height = args.width or 640, args.height or 480
+    source = None
+    if args.source:
+        size = (width, height) if args.width or args.height else None
+        source = FileFrameSource(args.source, fps=args.fps, jpeg_quality=args.quality, size=size)
+    sim = ESP32Simulator(SimulatedCamera(width, height, args.fps, args.quality, source),
+                         args.host, args.http_port, args.tcp_port)
+    sim.start()
+    print(f"✅ ESP32 simulator: http://{args.host}:{args.http_port}/stream (after /start_preview), "
+          f"tcp://{args.host}:{args.tcp_port}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"Camera: {sim.camera.stats.fps:.1f} FPS, {sim.camera.stats.bytes_per_sec / 1024:.0f} KiB/s")
+    except KeyboardInterrupt:
+        sim.stop()
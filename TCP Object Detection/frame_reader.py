@@ -0,0 +1,163 @@
+import struct
+import time
+import cv2
+import numpy as np
+
+# ----------------------------
+# Length-prefixed JPEG framing used by CameraTCPConnection.ino:
+#   4-byte little-endian frame size, then the JPEG bytes
+# ----------------------------
+FRAME_HEADER = struct.Struct('<I')
+MAX_FRAME_SIZE = 4 * 1024 * 1024  # anything larger means we lost sync with the stream
+
+
+class RateCounter:
+    """Counts frames and bytes, and refreshes fps / bytes_per_sec once per interval."""
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.fps = 0.0
+        self.bytes_per_sec = 0.0
+        self.total_frames = 0
+        self.total_bytes = 0
+        self._frames = 0
+        self._bytes = 0
+        self._start = time.perf_counter()
+
+    def add(self, nbytes=0):
+        self.total_frames += 1
+        self.total_bytes += nbytes
+        self._frames += 1
+        self._bytes += nbytes
+        now = time.perf_counter()
+        elapsed = now - self._start
+        if elapsed >= self.interval:
+            self.fps = self._frames / elapsed
+            self.bytes_per_sec = self._bytes / elapsed
+            self._frames = 0
+            self._bytes = 0
+            self._start = now
+
+    def as_dict(self):
+        return {
+            "fps": self.fps,
+            "bytes_per_sec": self.bytes_per_sec,
+            "total_frames": self.total_frames,
+            "total_bytes": self.total_bytes,
+        }
+
+
+class FrameReader:
+    """
+    Reads length-prefixed frames from a connected socket with recv_into, straight
+    into one preallocated bytearray that only grows when a larger frame arrives.
+    read_frame() returns a memoryview into that buffer, which stays valid until
+    the next call, so frames reach cv2.imdecode without intermediate copies.
+    """
+    def __init__(self, sock, initial_size=64 * 1024, max_frame_size=MAX_FRAME_SIZE):
+        self.sock = sock
+        self.max_frame_size = max_frame_size
+        self.stats = RateCounter()
+        self._header = bytearray(FRAME_HEADER.size)
+        self._header_view = memoryview(self._header)
+        self._buffer = bytearray(initial_size)
+        self._view = memoryview(self._buffer)
+
+    def _recv_exactly(self, view):
+        """Fill view completely; False if the peer closed the connection first."""
+        received = 0
+        while received < len(view):
+            n = self.sock.recv_into(view[received:])
+            if n == 0:
+                return False
+            received += n
+        return True
+
+    def _reserve(self, size):
+        if size > len(self._buffer):
+            # Frames still referencing the old buffer keep it alive until they are dropped
+            self._buffer = bytearray(max(size, 2 * len(self._buffer)))
+            self._view = memoryview(self._buffer)
+
+    def read_frame(self):
+        """Return a memoryview of the next frame's payload, or None once the stream ends."""
+        if not self._recv_exactly(self._header_view):
+            return None
+        frame_size, = FRAME_HEADER.unpack_from(self._header)
+        if frame_size == 0 or frame_size > self.max_frame_size:
+            raise ValueError(f"Invalid frame size {frame_size}; stream out of sync")
+
+        self._reserve(frame_size)
+        frame = self._view[:frame_size]
+        if not self._recv_exactly(frame):
+            return None
+        self.stats.add(FRAME_HEADER.size + frame_size)
+        return frame
+
+    def __iter__(self):
+        while True:
+            frame = self.read_frame()
+            if frame is None:
+                return
+            yield frame
+
+
+def decode_frame(frame, flags=cv2.IMREAD_COLOR):
+    """Decode a JPEG held in any buffer (bytes, bytearray, memoryview) without copying it first."""
+    return cv2.imdecode(np.frombuffer(frame, np.uint8), flags)
+
+
+# libjpeg can decode straight to 1/2, 1/4 or 1/8 size by skipping DCT coefficients,
+# which is much cheaper than a full decode followed by a resize
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def reduced_scale(source_width, target_width):
+    """Largest decode scale that still leaves frames at least target_width pixels wide."""
+    if not target_width:
+        return 1
+    scale = 1
+    for s in (2, 4, 8):
+        if -(-source_width // s) >= target_width:
+            scale = s
+    return scale
+
+
+def scale_box(box, factor):
+    """Map (x1, y1, x2, y2) between decode scales: reduced -> full with factor=scale, full -> reduced with 1/scale."""
+    if box is None:
+        return None
+    return tuple(int(v * factor) for v in box)
+
+
+class ScaledDecoder:
+    """
+    Decodes JPEGs at the coarsest scale that keeps frames at least target_width
+    wide (target_width=None always decodes at full size). The camera's width is
+    learned from the first frame, decoded at full size, and re-learned whenever
+    a frame comes out at an unexpected size. decode() returns (image, scale);
+    coordinates on the image map back to the camera frame with scale_box(box, scale).
+    """
+    def __init__(self, target_width=None):
+        self.target_width = target_width
+        self.source_width = None
+        self.scale = 1
+
+    def decode(self, frame):
+        scale = self.scale
+        img = decode_frame(frame, REDUCED_DECODE_FLAGS[scale])
+        if img is None:
+            return None, scale
+        width = img.shape[1]
+        if self.source_width is None or width != -(-self.source_width // scale):
+            # First frame or the camera changed resolution: this one is used at full size
+            if scale != 1:
+                img = decode_frame(frame)
+                scale = 1
+            self.source_width = img.shape[1]
+            self.scale = reduced_scale(self.source_width, self.target_width)
+        return img, scale
@@ -0,0 +1,212 @@
+import glob
+import os
+import socket
+import threading
+import time
+import cv2
+from frame_reader import FrameReader, RateCounter
+from mjpeg_client import MJPEGClient
+from stream_pipeline import LatestSlot
+
+# ----------------------------
+# Frame sources: every way a JPEG frame can reach the detection stack, behind
+# one interface. Iterate a source for every frame in order, or start() it and
+# read() to always get the newest one. Items are (jpeg_bytes, arrival) with
+# arrival from time.perf_counter().
+#
+#   open_source("http://192.168.0.153/stream")   ESP32 CameraWebServer (MJPEG over HTTP)
+#   open_source("tcp://192.168.0.164:12345")     CameraTCPConnection.ino (length-prefixed)
+#   open_source("clip.mp4") / open_source("frames/")   recorded video or a directory of images
+#
+# yolo_command_objects.py, measure_FPS.py and dummy_yolo_stream_test.py read
+# their camera through this. The Flask TCP server and batch_scheduler.py keep
+# their own FrameReader loops: they time the receive stage per frame and end
+# with the stream instead of reconnecting.
+# ----------------------------
+
+
+class FrameSource:
+    """Base class; subclasses implement _frames(), a generator of JPEG bytes."""
+    def __init__(self):
+        self.stats = RateCounter()
+        self.frames = LatestSlot()
+        self._running = False
+        self._thread = None
+
+    def _frames(self):
+        raise NotImplementedError
+
+    def __iter__(self):
+        self._running = True
+        for jpeg in self._frames():
+            self.stats.add(len(jpeg))
+            yield jpeg, time.perf_counter()
+            if not self._running:
+                return
+
+    def start(self):
+        if self._thread:
+            return
+        self.frames.clear()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for item in self:
+            self.frames.put(item)
+
+    def read(self, timeout=None):
+        """Newest (jpeg_bytes, arrival) not returned before, or None on timeout."""
+        item = self.frames.get(timeout)
+        return item[1] if item else None
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+
+class HTTPMJPEGSource(FrameSource):
+    """ESP32 /stream over HTTP (multipart/x-mixed-replace), see MJPEGClient."""
+    def __init__(self, url, **client_kwargs):
+        super().__init__()
+        self.client = MJPEGClient(url, **client_kwargs)
+
+    def _frames(self):
+        for jpeg, _ in self.client:
+            yield jpeg
+
+    def stop(self):
+        self.client.stop()
+        super().stop()
+
+
+class TCPFrameSource(FrameSource):
+    """Length-prefixed JPEGs from CameraTCPConnection.ino, reconnecting with backoff."""
+    def __init__(self, host, port=12345, timeout=5.0, initial_delay=0.5, max_delay=5.0):
+        super().__init__()
+        self.address = (host, port)
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.reconnects = 0
+        self._sock = None
+
+    def _frames(self):
+        delay = self.initial_delay
+        while self._running:
+            try:
+                self._sock = socket.create_connection(self.address, timeout=self.timeout)
+                self._sock.settimeout(None)
+                for frame in FrameReader(self._sock):
+                    delay = self.initial_delay
+                    yield bytes(frame)  # the reader reuses its buffer
+                if not self._running:
+                    return
+                print("⚠️ TCP stream ended, reconnecting...")
+            except Exception as e:
+                if not self._running:
+                    return
+                print(f"⚠️ TCP stream error: {e}; reconnecting in {delay:.1f}s")
+            finally:
+                if self._sock:
+                    self._sock.close()
+                    self._sock = None
+            self.reconnects += 1
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_delay)
+
+    def stop(self):
+        self._running = False
+        if self._sock:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        super().stop()
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+DEFAULT_FPS = 30.0
+
+
+class FileFrameSource(FrameSource):
+    """
+    A video file or a directory of images, paced at fps (if None, the video's
+    own rate, or DEFAULT_FPS for a directory; 0 reads as fast as possible) and
+    optionally looped. With size=(width, height) every frame is resized to it.
+    Otherwise JPEG files are passed through as-is; everything else is encoded
+    at jpeg_quality, like the camera would.
+    """
+    def __init__(self, path, fps=None, loop=True, jpeg_quality=80, size=None):
+        super().__init__()
+        self.path = path
+        self.fps = fps
+        self.loop = loop
+        self.size = tuple(size) if size else None
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)]
+
+    def _encode(self, img):
+        if img is None:
+            return None
+        if self.size and (img.shape[1], img.shape[0]) != self.size:
+            img = cv2.resize(img, self.size, interpolation=cv2.INTER_AREA)
+        ok, jpeg = cv2.imencode('.jpg', img, self.encode_params)
+        return jpeg.tobytes() if ok else None
+
+    def _directory_frames(self):
+        files = sorted(f for f in glob.glob(os.path.join(self.path, "*")) if f.lower().endswith(IMAGE_EXTENSIONS))
+        if not files:
+            raise FileNotFoundError(f"No images found in {self.path}")
+        if self.fps is None:
+            self.fps = DEFAULT_FPS
+        for f in files:
+            if f.lower().endswith((".jpg", ".jpeg")) and not self.size:
+                with open(f, "rb") as fh:
+                    yield fh.read()
+            else:
+                yield self._encode(cv2.imread(f))
+
+    def _video_frames(self):
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            raise FileNotFoundError(f"Could not open video: {self.path}")
+        if self.fps is None:
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+        try:
+            while True:
+                ret, img = cap.read()
+                if not ret:
+                    return
+                yield self._encode(img)
+        finally:
+            cap.release()
+
+    def _frames(self):
+        frames = self._directory_frames if os.path.isdir(self.path) else self._video_frames
+        next_at = time.perf_counter()
+        while self._running:
+            for jpeg in frames():
+                if jpeg is None:
+                    continue
+                if self.fps:
+                    next_at += 1.0 / self.fps
+                    time.sleep(max(0.0, next_at - time.perf_counter()))
+                yield jpeg
+                if not self._running:
+                    return
+            if not self.loop:
+                return
+
+
+def open_source(spec, **kwargs):
+    """http(s)://... -> HTTPMJPEGSource, tcp://host:port -> TCPFrameSource, anything else -> FileFrameSource."""
+    if spec.startswith(("http://", "https://")):
+        return HTTPMJPEGSource(spec, **kwargs)
+    if spec.startswith("tcp://"):
+        host, sep, port = spec[len("tcp://"):].rpartition(":")
+        if not sep:
+            return TCPFrameSource(port, **kwargs)
+        return TCPFrameSource(host, int(port), **kwargs)
+    return FileFrameSource(spec, **kwargs)
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import namedtuple
+from frame_reader import RateCounter
+from stream_pipeline import LatestSlot
+
+# value is whatever the detect function returned; frame_seq identifies the
+# frame it was computed on so overlays can be drawn on any later frame
+DetectionResult = namedtuple("DetectionResult", ["frame_seq", "value", "inference_ms", "finished_at"])
+
+
+class InferenceWorker:
+    """
+    One long-lived detection thread for continuous mode. submit() drops the frame
+    into a single-slot buffer, so the worker always runs on the newest frame and
+    intermediate frames are skipped (counted in frames.dropped). target_fps caps
+    the inference rate; the measured rate is in stats.fps, independent of the
+    stream's own FPS.
+    """
+    def __init__(self, detect, target_fps=None, on_result=None):
+        self.detect = detect
+        self.target_fps = target_fps
+        self.on_result = on_result
+        self.frames = LatestSlot()
+        self.stats = RateCounter()
+        self.latest = None
+        self._running = False
+        self._thread = None
+
+    @property
+    def fps(self):
+        return self.stats.fps
+
+    def submit(self, frame_seq, frame):
+        self.frames.put((frame_seq, frame))
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self.frames.clear()
+        self._thread = threading.Thread(target=self._run, name="InferenceWorker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        interval = 1.0 / self.target_fps if self.target_fps else 0.0
+        while self._running:
+            item = self.frames.get(timeout=0.5)
+            if item is None:
+                continue
+            _, (frame_seq, frame) = item
+
+            started = time.perf_counter()
+            try:
+                value = self.detect(frame)
+            except Exception as e:
+                print(f"⚠️ Inference error: {e}")
+                continue
+            finished = time.perf_counter()
+
+            self.latest = DetectionResult(frame_seq, value, 1000 * (finished - started), finished)
+            self.stats.add()
+            if self.on_result:
+                self.on_result(self.latest)
+
+            remaining = interval - (time.perf_counter() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def as_dict(self):
+        latest = self.latest
+        return {
+            "fps": self.stats.fps,
+            "target_fps": self.target_fps,
+            "inferences": self.stats.total_frames,
+            "skipped_frames": self.frames.dropped,
+            "last_frame_seq": latest.frame_seq if latest else None,
+            "last_inference_ms": latest.inference_ms if latest else None,
+        }
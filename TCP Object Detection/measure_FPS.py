@@ -1,11 +1,14 @@
 # COMMENT OUT THE YOLO PREDICT LINE TO SEE HOW FAST THE NETWORK PART ALONE IS.
 
+import sys
 import time
 import os
 import cv2
+from frame_reader import decode_frame
+from frame_source import open_source
 import requests
 import yaml  # <-- changed here
-from ultralytics import YOLO
+from model_service import load_model
 
 # 1. Load Config
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -18,19 +21,17 @@ with open(CONFIG_PATH, "r") as f:
     config = yaml.safe_load(f)
 
 # Load base IP (e.g. "http://192.168.0.153")
-base_ip = config.get("ip_base_url", "http://192.168.0.153")
+base_ip = config.get("ip_stream_url", config.get("ip_base_url", "http://192.168.0.153"))
 
 # Construct endpoints
 ESP32_START_URL = f"{base_ip}/start_preview"
 ESP32_STREAM_URL = f"{base_ip}/stream"
 
-yolo_model_path = os.path.join(SCRIPT_DIR, config.get("yolo_model", "yolo_stuff/yolo11n.pt"))
 imgsz = config.get("imgsz", 320)
 classes = config.get("classes", [39, 63, 66, 67, 76])
 
-# 2. Initialize YOLO
-print(f"Loading YOLO model from: {yolo_model_path}")
-model = YOLO(yolo_model_path)
+# 2. Initialize YOLO (shared service if config.model_service is set)
+model = load_model(config, SCRIPT_DIR)
 
 # 3. Tell ESP32 to start streaming
 print(f"Sending start command to ESP32: {ESP32_START_URL}")
@@ -41,17 +42,19 @@ except Exception as e:
     print(f"⚠️ Warning: Could not send start_preview: {e}")
 
 # 4. Connect to ESP32 MJPEG Stream
-print(f"Connecting to ESP32 stream: {ESP32_STREAM_URL}")
-cap = cv2.VideoCapture(ESP32_STREAM_URL)
+# Optional argument: any other frame source, e.g. tcp://127.0.0.1:12345 or a video file
+stream_source = sys.argv[1] if len(sys.argv) > 1 else ESP32_STREAM_URL
+print(f"Connecting to ESP32 stream: {stream_source}")
+cap = open_source(stream_source)  # every frame, in arrival order
 
 frame_count = 0
 start_time = time.time()
 
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        print("❌ Failed to grab frame (maybe stream not active?)")
-        break
+for jpeg, arrival in cap:
+    frame = decode_frame(jpeg)
+    if frame is None:
+        print("❌ Failed to decode frame")
+        continue
 
     # Run YOLO inference
     #! Comment this line out to see how fast the network part alone is.
@@ -72,5 +75,5 @@ while True:
     if cv2.waitKey(1) & 0xFF == ord('q'):
         break
 
-cap.release()
+cap.stop()
 cv2.destroyAllWindows()
@@ -0,0 +1,66 @@
+import threading
+import cv2
+from frame_reader import RateCounter
+
+PART_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+
+
+class MJPEGBroadcaster:
+    """
+    Encodes every new frame exactly once and shares the resulting multipart part
+    with all /video_feed clients. Clients sleep on a condition variable until the
+    frame sequence number moves past the one they last sent, and always jump to
+    the newest frame, so a slow client skips frames instead of queuing them.
+    A publish may carry a tag (e.g. a frame id) that stream() reports through
+    on_send once the part has been handed to the client.
+    """
+    def __init__(self, jpeg_quality=None):
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)] if jpeg_quality else []
+        self.stats = RateCounter()
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._part = None
+        self._tag = None
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def publish(self, frame, tag=None):
+        """Encode a BGR frame and publish it; returns False if encoding failed."""
+        ok, jpeg = cv2.imencode('.jpg', frame, self.encode_params)
+        if not ok:
+            return False
+        self.publish_jpeg(jpeg.tobytes(), tag)
+        return True
+
+    def publish_jpeg(self, jpeg_bytes, tag=None):
+        """Publish an already-encoded JPEG."""
+        part = b''.join((PART_HEADER, jpeg_bytes, b'\r\n'))
+        with self._cond:
+            self._seq += 1
+            self._part = part
+            self._tag = tag
+            # publish_jpeg() runs on both the decode and render threads in passthrough mode
+            self.stats.add(len(jpeg_bytes))
+            self._cond.notify_all()
+
+    def wait(self, last_seq, timeout=None):
+        """Block until a frame newer than last_seq exists; (seq, part) or None on timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > last_seq, timeout):
+                return None
+            return self._seq, self._part
+
+    def stream(self, timeout=1.0, on_send=None):
+        """Generator for a Flask multipart/x-mixed-replace response."""
+        last_seq = 0
+        while True:
+            with self._cond:
+                if not self._cond.wait_for(lambda: self._seq > last_seq, timeout):
+                    continue
+                last_seq, part, tag = self._seq, self._part, self._tag
+            yield part
+            # Resumed: the server has written the part and asks for the next one
+            if on_send:
+                on_send(tag)
@@ -0,0 +1,147 @@
+import http.client
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+from frame_reader import MAX_FRAME_SIZE, RateCounter
+from stream_pipeline import LatestSlot
+
+# ----------------------------
+# multipart/x-mixed-replace reader for the ESP32 /stream endpoint
+# (CameraWebServer/app_httpd.cpp):
+#   --frame\r\nContent-Type: image/jpeg\r\n\r\n<jpeg>\r\n   ... repeated, HTTP chunked
+# Parts carry no Content-Length, so each JPEG ends where the next boundary
+# starts; a Content-Length header is used when a server does send one.
+# ----------------------------
+BOUNDARY_RE = re.compile(r'boundary="?([^";]+)"?', re.IGNORECASE)
+
+
+class MJPEGClient:
+    """
+    Yields raw JPEG buffers with their arrival time (time.perf_counter()) from
+    one persistent HTTP connection, reconnecting with exponential backoff when
+    the stream drops. Iterate it to get every frame, or start() it and read()
+    to always get only the newest one (older frames are counted in
+    frames.dropped), like cv2.VideoCapture but without its internal buffering.
+    """
+    def __init__(self, url, timeout=5.0, initial_delay=0.5, max_delay=5.0, read_size=64 * 1024):
+        self.url = url
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.read_size = read_size
+        self.stats = RateCounter()
+        self.frames = LatestSlot()
+        self.reconnects = 0
+        self._running = False
+        self._conn = None
+        self._thread = None
+
+    # --- one connection ---
+    def _open(self):
+        parts = urlsplit(self.url)
+        conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self._conn = conn_cls(parts.hostname, parts.port, timeout=self.timeout)
+        self._conn.request("GET", parts.path or "/")
+        response = self._conn.getresponse()
+        if response.status != 200:
+            raise ConnectionError(f"HTTP {response.status} {response.reason} from {self.url}")
+        match = BOUNDARY_RE.search(response.getheader("Content-Type", ""))
+        boundary = match.group(1) if match else "frame"
+        return response, b"--" + boundary.encode()
+
+    def _close(self):
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def iter_connection(self):
+        """(jpeg_bytes, arrival) for every part of a single connection; returns when it closes."""
+        response, boundary = self._open()
+        buf = bytearray()
+        scan_from = 0   # delimiter search resumes here instead of rescanning the whole part
+        try:
+            while True:
+                start = buf.find(boundary)
+                header_end = buf.find(b"\r\n\r\n", start) if start >= 0 else -1
+                if header_end < 0:
+                    chunk = response.read1(self.read_size)
+                    if not chunk:
+                        return
+                    buf += chunk
+                    continue
+
+                headers = bytes(buf[start:header_end]).lower()
+                body = header_end + 4
+                match = re.search(rb"content-length:\s*(\d+)", headers)
+                if match:
+                    end = body + int(match.group(1))
+                    while len(buf) < end:
+                        chunk = response.read1(self.read_size)
+                        if not chunk:
+                            return
+                        buf += chunk
+                else:
+                    end = buf.find(b"\r\n" + boundary, max(body, scan_from))
+                    if end < 0:
+                        if len(buf) - body > MAX_FRAME_SIZE:
+                            raise ValueError("MJPEG part exceeds MAX_FRAME_SIZE; boundary lost")
+                        scan_from = max(body, len(buf) - len(boundary) - 2)
+                        chunk = response.read1(self.read_size)
+                        if not chunk:
+                            return
+                        buf += chunk
+                        continue
+
+                arrival = time.perf_counter()
+                jpeg = bytes(buf[body:end])
+                del buf[:end]
+                scan_from = 0
+                self.stats.add(len(jpeg))
+                yield jpeg, arrival
+        finally:
+            self._close()
+
+    # --- reconnecting stream ---
+    def __iter__(self):
+        self._running = True
+        delay = self.initial_delay
+        while self._running:
+            try:
+                for item in self.iter_connection():
+                    delay = self.initial_delay
+                    yield item
+                    if not self._running:
+                        return
+                print("⚠️ MJPEG stream ended, reconnecting...")
+            except Exception as e:
+                if not self._running:
+                    return
+                print(f"⚠️ MJPEG stream error: {e}; reconnecting in {delay:.1f}s")
+            self.reconnects += 1
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_delay)
+
+    # --- latest-frame-only mode ---
+    def start(self):
+        if self._thread:
+            return
+        self.frames.clear()
+        self._thread = threading.Thread(target=self._run, name="MJPEGClient", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for item in self:
+            self.frames.put(item)
+
+    def read(self, timeout=None):
+        """Newest (jpeg_bytes, arrival) not returned before, or None on timeout."""
+        item = self.frames.get(timeout)
+        return item[1] if item else None
+
+    def stop(self):
+        self._running = False
+        self._close()
+        if self._thread:
+            self._thread.join(timeout=self.timeout)
+            self._thread = None
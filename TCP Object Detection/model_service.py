@@ -0,0 +1,325 @@
+import argparse
+import json
+import os
+import shutil
+import socket
+import socketserver
+import threading
+import time
+import numpy as np
+from frame_reader import FRAME_HEADER, FrameReader, decode_frame
+
+# ----------------------------
+# Shared, pre-warmed YOLO model
+#
+# In-process:  model = get_model(path)           (one instance per weight file)
+# Shared:      python model_service.py           (serves the model on localhost)
+#              model_service: "127.0.0.1:5005"   (in config.yaml, front-ends connect to it)
+# ----------------------------
+DEFAULT_PORT = 5005
+
+# config.yaml `backend`: runtime used for inference. Non-torch backends are
+# exported from the .pt weights once and reused on later starts. Exports use
+# dynamic input shapes, since ROI crops run at roi.imgsz and the batch
+# scheduler sends several frames per call.
+BACKENDS = {
+    "torch": None,
+    "onnxruntime": ("onnx", ".onnx"),
+    "openvino": ("openvino", "_openvino_model"),
+}
+
+
+def to_numpy(values):
+    """Tensor (CPU or GPU) or array-like -> NumPy array."""
+    if hasattr(values, "cpu"):
+        values = values.cpu()
+    if hasattr(values, "numpy"):
+        return values.numpy()
+    return np.asarray(values)
+
+
+def export_weights(path, backend="torch", imgsz=640):
+    """Path of the weights to load for backend, exporting them next to the .pt file if not cached yet."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+    if BACKENDS[backend] is None:
+        return path
+
+    export_format, suffix = BACKENDS[backend]
+    cached = f"{os.path.splitext(path)[0]}_{imgsz}_dynamic{suffix}"
+    if os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(path):
+        return cached
+
+    from ultralytics import YOLO
+
+    print(f"Exporting {path} for {backend} (imgsz={imgsz}, dynamic shapes), this only happens once...")
+    exported = YOLO(path).export(format=export_format, imgsz=imgsz, dynamic=True)
+    check_dynamic_shapes(exported, imgsz)
+    if os.path.isdir(cached):
+        shutil.rmtree(cached)
+    os.replace(exported, cached)
+    print(f"✅ Cached {backend} model: {cached}")
+    return cached
+
+
+def check_dynamic_shapes(path, imgsz=640):
+    """Run an exported model on a batch of two at imgsz and at a smaller size; raises if it only takes one shape."""
+    from ultralytics import YOLO
+
+    model = YOLO(path, task="detect")
+    for size in (imgsz, max(32, imgsz // 2 // 32 * 32)):
+        frames = [np.zeros((size, size, 3), dtype=np.uint8)] * 2
+        results = model.predict(frames, imgsz=size, verbose=False)
+        if len(results) != len(frames):
+            raise RuntimeError(f"Exported model {path} returned {len(results)} results for a batch of {len(frames)}")
+
+
+class LocalModel:
+    """
+    An in-process YOLO model. Warm-up (a first inference on a blank frame) runs
+    in the background as soon as the model is loaded; predict() waits for it and
+    serializes calls, since the ultralytics predictor is not thread-safe.
+    """
+    def __init__(self, path, imgsz=640, warmup=True, backend="torch"):
+        from ultralytics import YOLO
+
+        self.path = export_weights(path, backend, imgsz)
+        self.backend = backend
+        self.imgsz = imgsz
+        print(f"Loading YOLO model from: {self.path}")
+        self.model = YOLO(self.path, task="detect")
+        self.names = self.model.names
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        if warmup:
+            threading.Thread(target=self._warmup, daemon=True).start()
+        else:
+            self.ready.set()
+
+    def _warmup(self):
+        started = time.perf_counter()
+        try:
+            with self._lock:
+                self.model.predict(np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8), imgsz=self.imgsz, verbose=False)
+            print(f"✅ YOLO warm-up done in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            print(f"⚠️ YOLO warm-up failed: {e}")
+        finally:
+            self.ready.set()
+
+    def predict(self, source, **kwargs):
+        self.ready.wait()
+        with self._lock:
+            return self.model.predict(source, **kwargs)
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+def get_model(path, imgsz=640, warmup=True, backend="torch"):
+    """Process-wide singleton per weight file and backend."""
+    key = (path, backend)
+    with _models_lock:
+        if key not in _models:
+            _models[key] = LocalModel(path, imgsz, warmup, backend)
+        return _models[key]
+
+
+def load_model(config, script_dir):
+    """The model a front-end should use: the shared service if configured, else in-process."""
+    address = config.get("model_service")
+    if address:
+        return RemoteModel(address)
+    yolo_model_path = os.path.join(script_dir, config.get("yolo_model", "yolo11n.pt"))
+    return get_model(yolo_model_path, config.get("imgsz", 640), backend=config.get("backend", "torch"))
+
+
+# ----------------------------
+# Compact results: what crosses the socket, and what RemoteModel hands back
+# ----------------------------
+class CompactBoxes:
+    """Minimal stand-in for ultralytics Boxes: xyxy (N, 4), conf (N,), cls (N,)."""
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.asarray(cls, dtype=np.float32).reshape(-1)
+
+    def __len__(self):
+        return len(self.conf)
+
+    def __iter__(self):
+        # Per-box views keep the box.xyxy[0] / box.conf[0] / box.cls[0] access pattern working
+        for i in range(len(self)):
+            yield CompactBoxes(self.xyxy[i:i + 1], self.conf[i:i + 1], self.cls[i:i + 1])
+
+
+class CompactResult:
+    def __init__(self, boxes, names):
+        self.boxes = boxes
+        self.names = names
+
+
+def compact_results(results):
+    """ultralytics results -> JSON-friendly [{"boxes": [[x1, y1, x2, y2, conf, cls], ...], "names": {...}}]"""
+    compact = []
+    for r in results:
+        xyxy = to_numpy(r.boxes.xyxy).reshape(-1, 4)
+        confs = to_numpy(r.boxes.conf).reshape(-1)
+        cls = to_numpy(r.boxes.cls).reshape(-1)
+        rows = np.column_stack((xyxy, confs, cls)).tolist()
+        names = {int(c): r.names[int(c)] for c in set(cls.tolist())}
+        compact.append({"boxes": rows, "names": names})
+    return compact
+
+
+def expand_results(compact):
+    results = []
+    for r in compact:
+        rows = np.asarray(r["boxes"], dtype=np.float32).reshape(-1, 6)
+        names = {int(k): v for k, v in r["names"].items()}
+        results.append(CompactResult(CompactBoxes(rows[:, :4], rows[:, 4], rows[:, 5]), names))
+    return results
+
+
+# ----------------------------
+# Wire format: length-prefixed messages. A request is a JSON header followed by
+# one message of bytes per frame (header["frames"] describes each one, so a
+# batch travels in a single round-trip); the response is one JSON message with
+# a result per frame
+# ----------------------------
+def send_message(sock, payload):
+    sock.sendall(FRAME_HEADER.pack(len(payload)))
+    sock.sendall(payload)
+
+
+class RemoteModel:
+    """Client for a running model service; predict() mirrors YOLO.predict for one frame or a list of them."""
+    def __init__(self, address, timeout=10.0):
+        host, _, port = address.rpartition(":")
+        self.address = (host or "127.0.0.1", int(port or DEFAULT_PORT))
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = FrameReader(self._sock)
+
+    def _close(self):
+        if self._sock:
+            self._sock.close()
+        self._sock = None
+        self._reader = None
+
+    def predict(self, source, jpeg=False, **kwargs):
+        """
+        source is a BGR frame or JPEG bytes with jpeg=True (no decode needed
+        client-side), or a list of either; a list is predicted as one batch in
+        a single request.
+        """
+        sources = source if isinstance(source, list) else [source]
+        if not sources:
+            return []
+        options = {k: v for k, v in kwargs.items() if k in ("classes", "imgsz", "conf")}
+        if jpeg:
+            frames = [{} for _ in sources]
+            payloads = sources
+        else:
+            arrays = [np.ascontiguousarray(item) for item in sources]
+            frames = [{"shape": frame.shape, "dtype": str(frame.dtype)} for frame in arrays]
+            payloads = [memoryview(frame).cast("B") for frame in arrays]
+        header = {"format": "jpeg" if jpeg else "raw", "frames": frames, "batch": isinstance(source, list), **options}
+
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    send_message(self._sock, json.dumps(header).encode())
+                    for payload in payloads:
+                        send_message(self._sock, payload)
+                    reply = self._reader.read_frame()
+                    if reply is None:
+                        raise ConnectionError("model service closed the connection")
+                    response = json.loads(bytes(reply))
+                    break
+                except OSError:
+                    self._close()
+                    if attempt:
+                        raise
+        if "error" in response:
+            raise RuntimeError(f"Model service error: {response['error']}")
+        return expand_results(response["results"])
+
+
+class _ModelRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = FrameReader(self.request)
+        model = self.server.model
+        while True:
+            header = reader.read_frame()
+            if header is None:
+                return
+            header = json.loads(bytes(header))
+            frames = []
+            error = None
+            for meta in header.get("frames") or [header]:
+                payload = reader.read_frame()
+                if payload is None:
+                    return
+                if error:
+                    continue  # still drain the request's remaining frames
+                # The reader reuses its buffer, so each frame is decoded or copied before the next read
+                try:
+                    if header.get("format") == "jpeg":
+                        frame = decode_frame(payload)
+                        if frame is None:
+                            raise ValueError("could not decode JPEG frame")
+                    else:
+                        frame = np.frombuffer(payload, dtype=meta["dtype"]).reshape(meta["shape"]).copy()
+                    frames.append(frame)
+                except Exception as e:
+                    error = e
+
+            try:
+                if error:
+                    raise error
+                options = {k: header[k] for k in ("classes", "imgsz", "conf") if k in header}
+                source = frames if header.get("batch") else frames[0]
+                results = model.predict(source, verbose=False, **options)
+                response = {"results": compact_results(results)}
+            except Exception as e:
+                response = {"error": str(e)}
+            send_message(self.request, json.dumps(response).encode())
+
+
+class ModelServer(socketserver.ThreadingTCPServer):
+    """Serves one loaded model to any number of local front-ends."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, model, host="127.0.0.1", port=DEFAULT_PORT):
+        self.model = model
+        super().__init__((host, port), _ModelRequestHandler)
+
+
+if __name__ == "__main__":
+    import yaml
+
+    SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(SCRIPT_DIR, "config.yaml"), "r") as f:
+        config = yaml.safe_load(f)
+
+    parser = argparse.ArgumentParser(description="Serve one pre-warmed YOLO model to local camera front-ends")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    model = load_model({**config, "model_service": None}, SCRIPT_DIR)
+    model.ready.wait()
+    with ModelServer(model, args.host, args.port) as server:
+        print(f"✅ Model service listening on {args.host}:{args.port}")
+        server.serve_forever()
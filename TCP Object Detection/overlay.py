@@ -0,0 +1,47 @@
+import cv2
+import numpy as np
+
+# ----------------------------
+# Frame + command panel compositing without per-frame allocations
+# ----------------------------
+
+
+class OverlayCompositor:
+    """
+    Owns one preallocated canvas of (frame height + panel height) x frame width.
+    compose() copies the frame into the top region and returns a view of it to
+    draw overlays on; the command panel below is only re-rendered when its text
+    changes. The canvas is reused for every frame, so consumers must be done
+    with it (encoded, shown) before the next compose().
+    """
+    def __init__(self, panel_height=150, font_scale=0.6, line_height=25, color=(255, 255, 255)):
+        self.panel_height = panel_height
+        self.font_scale = font_scale
+        self.line_height = line_height
+        self.color = color
+        self.canvas = None
+        self._panel_text = None
+
+    def _reserve(self, height, width):
+        shape = (height + self.panel_height, width, 3)
+        if self.canvas is None or self.canvas.shape != shape:
+            self.canvas = np.zeros(shape, dtype=np.uint8)
+            self._panel_text = None
+
+    def _render_panel(self, text_lines, height):
+        panel = self.canvas[height:]
+        panel[:] = 0
+        for i, line in enumerate(text_lines):
+            y = 25 + i * self.line_height
+            cv2.putText(panel, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, self.font_scale, self.color, 1, cv2.LINE_AA)
+        self._panel_text = tuple(text_lines)
+
+    def compose(self, frame, text_lines):
+        """Copy frame into the canvas, refresh the panel if needed; returns the frame region (a view)."""
+        height, width = frame.shape[:2]
+        self._reserve(height, width)
+        if self._panel_text != tuple(text_lines):
+            self._render_panel(text_lines, height)
+        region = self.canvas[:height]
+        np.copyto(region, frame)
+        return region
@@ -0,0 +1,43 @@
+from selection import result_arrays, select_from_arrays
+
+# ----------------------------
+# Region-of-interest inference (config.yaml `roi`): the object we want is the
+# one the camera points at, so try a center crop first and only widen the
+# window (by `growth` per step, up to the full frame) when nothing is found.
+# Boxes are shifted back into full-frame coordinates before selection.
+# ----------------------------
+
+
+def roi_windows(frame_shape, size, growth=2.0):
+    """Center-anchored (x0, y0, x1, y1) windows, smallest first; the last covers the whole frame."""
+    if size <= 0:
+        raise ValueError(f"roi size must be positive, got {size}")
+    if growth <= 1:
+        raise ValueError(f"roi growth must be greater than 1, got {growth}")
+    h, w = frame_shape[:2]
+    side = size
+    while True:
+        cw, ch = min(side, w), min(side, h)
+        x0, y0 = (w - cw) // 2, (h - ch) // 2
+        yield x0, y0, x0 + cw, y0 + ch
+        if cw == w and ch == h:
+            return
+        side = max(side + 1, int(side * growth))
+
+
+def detect_roi(model, frame, size, growth=2.0, policy="closest_to_center", roi_imgsz=None, **predict_kwargs):
+    """
+    (box, label, conf) from the smallest center window with a detection, in
+    full-frame coordinates. Crops are inferred at roi_imgsz; the full-frame
+    window keeps the regular predict_kwargs (imgsz included).
+    """
+    h, w = frame.shape[:2]
+    for x0, y0, x1, y1 in roi_windows(frame.shape, size, growth):
+        kwargs = predict_kwargs
+        if roi_imgsz and (x1 - x0, y1 - y0) != (w, h):
+            kwargs = {**predict_kwargs, "imgsz": roi_imgsz}
+        results = model.predict(frame[y0:y1, x0:x1], **kwargs)
+        xyxy, confs, cls, names = result_arrays(results)
+        if len(confs):
+            return select_from_arrays(xyxy + (x0, y0, x0, y0), confs, cls, names, frame.shape, policy)
+    return None, None, None
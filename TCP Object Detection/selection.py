@@ -0,0 +1,60 @@
+import numpy as np
+from model_service import to_numpy
+
+# ----------------------------
+# Choosing one detection out of a YOLO result, vectorized:
+# xyxy / conf / cls come out of the result tensors once as NumPy arrays and
+# every box is scored in a single pass
+#
+# config.yaml `selection_policy`:
+#   closest_to_center    box center nearest to the frame center (default)
+#   highest_confidence   highest confidence score
+#   largest_area         biggest box
+#   confidence_weighted  confidence scaled down linearly with distance from the center
+# ----------------------------
+POLICIES = ("closest_to_center", "highest_confidence", "largest_area", "confidence_weighted")
+
+
+def result_arrays(results):
+    """All boxes of a predict() call as (xyxy int (N, 4), conf (N,), cls int (N,), names)."""
+    xyxy, confs, cls = [], [], []
+    names = {}
+    for r in results:
+        xyxy.append(to_numpy(r.boxes.xyxy).reshape(-1, 4))
+        confs.append(to_numpy(r.boxes.conf).reshape(-1))
+        cls.append(to_numpy(r.boxes.cls).reshape(-1))
+        names.update(r.names)
+    if not xyxy:
+        return np.empty((0, 4), np.int64), np.empty(0, np.float32), np.empty(0, np.int64), names
+    # Truncate like int() so boxes and centers match the per-box loop this replaces
+    return (np.concatenate(xyxy).astype(np.int64), np.concatenate(confs),
+            np.concatenate(cls).astype(np.int64), names)
+
+
+def score(xyxy, confs, frame_shape, policy="closest_to_center"):
+    """Per-box score for policy; the selected box is the argmax."""
+    h, w = frame_shape[:2]
+    if policy == "highest_confidence":
+        return confs
+    if policy == "largest_area":
+        return (xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1])
+
+    centers = (xyxy[:, :2] + xyxy[:, 2:]) // 2
+    dist = np.hypot(centers[:, 0] - w // 2, centers[:, 1] - h // 2)
+    if policy == "closest_to_center":
+        return -dist
+    if policy == "confidence_weighted":
+        return confs * (1.0 - dist / np.hypot(w / 2, h / 2))
+    raise ValueError(f"Unknown selection policy {policy!r}; expected one of {', '.join(POLICIES)}")
+
+
+def select_detection(results, frame_shape, policy="closest_to_center"):
+    """(box, label, conf) of the detection chosen by policy, or (None, None, None)."""
+    return select_from_arrays(*result_arrays(results), frame_shape, policy)
+
+
+def select_from_arrays(xyxy, confs, cls, names, frame_shape, policy="closest_to_center"):
+    if len(confs) == 0:
+        return None, None, None
+    i = int(np.argmax(score(xyxy, confs, frame_shape, policy)))
+    return tuple(int(v) for v in xyxy[i]), names[int(cls[i])], float(confs[i])
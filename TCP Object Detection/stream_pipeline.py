@@ -0,0 +1,75 @@
+import threading
+from collections import deque
+from frame_reader import RateCounter
+
+# ----------------------------
+# Building blocks for the receive -> decode -> render pipeline
+# ----------------------------
+
+class LatestSlot:
+    """
+    Single-slot handoff between two threads. put() never blocks and overwrites
+    whatever the consumer has not picked up yet (counted in `dropped`), so a slow
+    consumer always gets the newest item and never stalls the producer.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._seq = 0
+        self._taken = 0
+        self.dropped = 0
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def put(self, item):
+        with self._cond:
+            if self._seq > self._taken:
+                self.dropped += 1
+            self._item = item
+            self._seq += 1
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """Wait for an item newer than the last one taken; (seq, item) or None on timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > self._taken, timeout):
+                return None
+            self._taken = self._seq
+            return self._seq, self._item
+
+    def peek(self):
+        """Latest (seq, item) without consuming it."""
+        with self._cond:
+            return self._seq, self._item
+
+    def clear(self):
+        with self._cond:
+            self._item = None
+            self._taken = self._seq
+
+
+class StageStats:
+    """Per-stage throughput plus work time and end-to-end age, averaged over recent frames."""
+    def __init__(self, window=60):
+        self.rate = RateCounter()
+        self._work = deque(maxlen=window)
+        self._age = deque(maxlen=window)
+
+    def add(self, started, finished, captured):
+        """started/finished bound this stage's work; captured is when the frame left the socket."""
+        self.rate.add()
+        self._work.append(finished - started)
+        self._age.append(finished - captured)
+
+    def as_dict(self):
+        work = list(self._work)
+        age = list(self._age)
+        return {
+            "fps": self.rate.fps,
+            "frames": self.rate.total_frames,
+            "work_ms": 1000 * sum(work) / len(work) if work else 0.0,
+            "latency_ms": 1000 * sum(age) / len(age) if age else 0.0,
+            "max_latency_ms": 1000 * max(age) if age else 0.0,
+        }
@@ -0,0 +1,133 @@
+import time
+import numpy as np
+
+# ----------------------------
+# Per-frame latency tracing from camera receive to command dispatch
+#
+# Each stage stamps time.perf_counter() for a frame id into a preallocated
+# ring (row = frame id % capacity, column = stage). Every cell has a single
+# writer, so no lock is taken on the streaming threads; readers copy the ring
+# and may see a frame that is still in flight, which only shows up as a
+# missing (NaN) later stage.
+# ----------------------------
+STAGES = ("receive", "decode", "inference_start", "inference_end", "overlay", "encode", "send", "command")
+
+# Stage durations are measured from the stage that feeds each one
+PREDECESSORS = {
+    "decode": "receive",
+    "inference_start": "receive",
+    "inference_end": "inference_start",
+    "overlay": "decode",
+    "encode": "overlay",
+    "send": "encode",
+    "command": "inference_end",
+}
+QUANTILES = (50, 95, 99)
+
+
+class FrameTracer:
+    def __init__(self, capacity=1024, stages=STAGES):
+        self.capacity = capacity
+        self.stages = stages
+        self._column = {stage: i for i, stage in enumerate(stages)}
+        self._times = np.full((capacity, len(stages)), np.nan)
+        self._ids = np.full(capacity, -1, dtype=np.int64)
+
+    def begin(self, frame_id, timestamp=None):
+        """Claim the ring row for a new frame and stamp its receive time."""
+        row = frame_id % self.capacity
+        self._ids[row] = -1  # invalidate before clearing so readers skip the half-reset row
+        self._times[row] = np.nan
+        self._times[row, 0] = time.perf_counter() if timestamp is None else timestamp
+        self._ids[row] = frame_id
+
+    def mark(self, frame_id, stage, timestamp=None, first=False):
+        """Stamp stage for frame_id; ignored once the row was reused. first=True keeps an earlier stamp."""
+        if frame_id is None:
+            return
+        row = frame_id % self.capacity
+        if self._ids[row] != frame_id:
+            return
+        col = self._column[stage]
+        if first and not np.isnan(self._times[row, col]):
+            return
+        self._times[row, col] = time.perf_counter() if timestamp is None else timestamp
+
+    def snapshot(self):
+        """(frame ids, times) for every traced frame, oldest first."""
+        ids = self._ids.copy()
+        times = self._times.copy()
+        valid = ids >= 0
+        order = np.argsort(ids[valid])
+        return ids[valid][order], times[valid][order]
+
+    def durations(self):
+        """Per stage: (seconds since receive, seconds since the feeding stage or None) of every traced frame."""
+        _, times = self.snapshot()
+        receive = times[:, 0]
+        result = {}
+        for stage in self.stages[1:]:
+            col = times[:, self._column[stage]]
+            since_receive = col - receive
+            stage_time = None
+            predecessor = PREDECESSORS.get(stage)
+            if predecessor:
+                stage_time = col - times[:, self._column[predecessor]]
+                stage_time = stage_time[~np.isnan(stage_time)]
+            result[stage] = (since_receive[~np.isnan(since_receive)], stage_time)
+        return result
+
+    def summary(self):
+        """Per stage: sample count and p50/p95/p99 (ms) since receive and since the feeding stage."""
+        result = {}
+        for stage, (since_receive, stage_time) in self.durations().items():
+            entry = {"count": int(len(since_receive)), "since_receive_ms": _percentiles(since_receive)}
+            if stage_time is not None:
+                entry["stage_ms"] = _percentiles(stage_time)
+            result[stage] = entry
+        return result
+
+    def recent(self, limit=50):
+        """The newest traced frames as {frame, stage: ms since receive}."""
+        ids, times = self.snapshot()
+        records = []
+        for frame_id, row in zip(ids[-limit:], times[-limit:]):
+            record = {"frame": int(frame_id)}
+            for stage, t in zip(self.stages, row):
+                if not np.isnan(t):
+                    record[stage] = round(1000 * (t - row[0]), 3)
+            records.append(record)
+        return records
+
+    def prometheus(self, prefix="camera_frame"):
+        """
+        Prometheus text exposition of durations() as two summaries, in seconds.
+        Quantiles, _sum and _count cover the frames still in the ring.
+        """
+        durations = self.durations()
+        latency = {stage: since_receive for stage, (since_receive, _) in durations.items()}
+        stage_times = {stage: stage_time for stage, (_, stage_time) in durations.items() if stage_time is not None}
+        lines = _summary_lines(f"{prefix}_latency_seconds", "Time from TCP receive to the end of each stage.", latency)
+        lines += _summary_lines(f"{prefix}_stage_seconds", "Time spent between a stage and the stage feeding it.", stage_times)
+        return "\n".join(lines) + "\n"
+
+
+def _summary_lines(name, help_text, series):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} summary"]
+    for stage, values in series.items():
+        quantiles = np.percentile(values, QUANTILES) if len(values) else [None] * len(QUANTILES)
+        for q, value in zip(QUANTILES, quantiles):
+            lines.append(f'{name}{{stage="{stage}",quantile="{q / 100}"}} {_format(value)}')
+        lines.append(f'{name}_sum{{stage="{stage}"}} {_format(float(np.sum(values)))}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {len(values)}')
+    return lines
+
+
+def _percentiles(values):
+    if len(values) == 0:
+        return {f"p{q}": None for q in QUANTILES}
+    return {f"p{q}": float(v) for q, v in zip(QUANTILES, 1000 * np.percentile(values, QUANTILES))}
+
+
+def _format(seconds):
+    return "NaN" if seconds is None else f"{seconds:.6f}"
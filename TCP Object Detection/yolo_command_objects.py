@@ -2,15 +2,20 @@
 # Seems to be slower? tho shoudlnt be too much slower
 
 import cv2
-from ultralytics import YOLO
 import asyncio
 import threading
-import math
 import os
 import requests
 import yaml
 import numpy as np
 import time
+from frame_reader import RateCounter, ScaledDecoder
+from frame_source import open_source
+from inference_worker import InferenceWorker
+from model_service import load_model
+from selection import POLICIES, select_detection
+from roi import detect_roi
+from overlay import OverlayCompositor
 
 ### Load Config
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -22,22 +27,27 @@ with open(CONFIG_PATH, "r") as f:
     config = yaml.safe_load(f)
 
 # Base IP and endpoints
-base_ip = config.get("ip_base_url", "http://192.168.0.153")
+base_ip = config.get("ip_stream_url", config.get("ip_base_url", "http://192.168.0.153"))
 ESP32_START_URL = f"{base_ip}/start_preview"
 ESP32_STOP_URL = f"{base_ip}/stop_preview"
 ESP32_STREAM_URL = f"{base_ip}/stream"
 
-### Initialize YOLO model
-yolo_model_path = os.path.join(SCRIPT_DIR, config.get("yolo_model", "yolo11n.pt"))
-# print("yolo_model_path:", yolo_model_path); assert(False)
+### Initialize YOLO model (shared service if config.model_service is set)
 imgsz = config.get("imgsz", 640)
 # print("imgsz:", imgsz); assert(False)
 conf = config.get("conf", 0.25)
 # print("conf:", conf); assert(False)
 classes = config.get("classes", [39, 63, 66, 67, 76])
 # print("classes:", classes); assert(False)
-print(f"Loading YOLO model from: {yolo_model_path}")
-model = YOLO(yolo_model_path)
+selection_policy = config.get("selection_policy", "closest_to_center")
+if selection_policy not in POLICIES:
+    raise ValueError(f"Unknown selection_policy {selection_policy!r}; expected one of {', '.join(POLICIES)}")
+roi = config.get("roi") or {}
+ROI_ENABLED = roi.get("enabled", False)
+ROI_SIZE = roi.get("size", 320)
+ROI_GROWTH = roi.get("growth", 2.0)
+ROI_IMGSZ = roi.get("imgsz", ROI_SIZE)
+model = load_model(config, SCRIPT_DIR)
 
 # Command mappings
 COMMANDS_PATH = os.path.join(SCRIPT_DIR, "commands.yaml")
@@ -66,6 +76,19 @@ def start_stream():
         print(f"⚠️ Could not start stream: {e}")
         return False
 
+def open_capture():
+    source = open_source(ESP32_STREAM_URL)
+    source.start()
+    return source
+
+def read_frame(source, timeout=1.0):
+    """Decode the newest frame from the stream; None if nothing arrived within timeout."""
+    item = source.read(timeout)
+    if item is None:
+        return None
+    frame, _ = decoder.decode(item[0])
+    return frame
+
 def stop_stream():
     try:
         requests.get(ESP32_STOP_URL, timeout=3)
@@ -77,7 +100,10 @@ def stop_stream():
 
 # Globals for stream and detection
 streaming = False
-cap = None
+cap = None  # FrameSource: newest frame only, reconnects with backoff by itself
+# Frames are decoded at reduced JPEG scale when the camera is wider than preview_width;
+# detections run on the same frames, so boxes stay in display coordinates
+decoder = ScaledDecoder(config.get("preview_width"))
 detecting = False  # To prevent overlapping detections
 highlight_box = None
 highlight_label = None
@@ -85,11 +111,11 @@ highlight_conf = None  # <-- NEW: store confidence of highlighted box
 highlight_duration = 0
 current_commands_text = ["Press SPACE to detect"]
 
-def run_detection_async(frame):
-    """Run YOLO detection asynchronously"""
-    global highlight_box, highlight_label, highlight_conf, highlight_duration, detecting, current_commands_text
-
-    detecting = True
+def find_closest_object(frame):
+    """Run YOLO on frame; return (box, label, conf) of the detection chosen by selection_policy."""
+    if ROI_ENABLED:
+        return detect_roi(model, frame, ROI_SIZE, ROI_GROWTH, selection_policy,
+                          roi_imgsz=ROI_IMGSZ, classes=classes, imgsz=imgsz, conf=conf, verbose=True)
     results = model.predict(
         frame,
         classes=classes,    # only specific objects
@@ -97,33 +123,13 @@ def run_detection_async(frame):
         conf=conf,
         verbose=True
     )
+    # print("r.boxes:", results[0].boxes)    # debugging
+    return select_detection(results, frame.shape, selection_policy)
+
+def show_detection(closest_box, closest_obj, closest_conf):
+    """Save the chosen detection for the overlay and prepare its commands text"""
+    global highlight_box, highlight_label, highlight_conf, highlight_duration, current_commands_text
 
-    closest_obj = None
-    closest_box = None
-    closest_distance = float("inf")
-    closest_conf = None
-    h, w = frame.shape[:2]
-    frame_center = (w // 2, h // 2)
-
-    # Find closest detected object
-    for r in results:
-        # print("r.boxes:", r.boxes)    # debugging
-        for box in r.boxes:
-            cls = int(box.cls[0])
-            # print("cls:", cls)    # debugging
-            label = r.names[cls]
-            # print("label:", label)    # debugging
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            obj_center_x = (x1 + x2) // 2
-            obj_center_y = (y1 + y2) // 2
-            dist = math.dist((obj_center_x, obj_center_y), frame_center)
-            if dist < closest_distance:
-                closest_distance = dist
-                closest_obj = label
-                closest_box = (x1, y1, x2, y2)
-                closest_conf = float(box.conf[0])    # conf means confidence score
-
-    # Save the chosen detection
     highlight_box = closest_box
     # print("highlight_box:", highlight_box)   # debugging
     highlight_label = closest_obj
@@ -143,41 +149,50 @@ def run_detection_async(frame):
     else:
         current_commands_text = ["No detection"]
 
+def run_detection_async(frame):
+    """Run YOLO detection asynchronously"""
+    global detecting
+
+    detecting = True
+    show_detection(*find_closest_object(frame))
     detecting = False
 
-def draw_commands_panel(frame, text_lines):
-    panel_height = 150
-    width = frame.shape[1]
-    panel = np.zeros((panel_height, width, 3), dtype=np.uint8)
-    font = cv2.FONT_HERSHEY_SIMPLEX
-    font_scale = 0.6
-    color = (255, 255, 255)
-    line_height = 25
-    y0 = 25
-    for i, line in enumerate(text_lines):
-        y = y0 + i * line_height
-        cv2.putText(panel, line, (10, y), font, font_scale, color, 1, cv2.LINE_AA)
-    combined = np.vstack((frame, panel))
-    return combined
+# Continuous detection (config: continuous_detection / detection_fps): one
+# long-lived worker always infers on the newest frame, skipping the rest
+CONTINUOUS_DETECTION = config.get("continuous_detection", False)
+DETECTION_FPS = config.get("detection_fps", 5)
+inference_worker = InferenceWorker(find_closest_object, DETECTION_FPS,
+                                   on_result=lambda result: show_detection(*result.value))
+stream_stats = RateCounter()
+frame_index = 0
+
+# Frame + command panel share one preallocated canvas; the panel is only
+# re-rendered when current_commands_text changes
+compositor = OverlayCompositor(panel_height=150)
 
 print("Controls:\n  p = toggle stream ON/OFF\n  SPACE = detect object\n  ESC = quit")
 print("Note: If stream is off and you press SPACE, stream will start then detect.")
+if CONTINUOUS_DETECTION:
+    print(f"Continuous detection ON (up to {DETECTION_FPS} inferences/s)")
+    inference_worker.start()
 
 while True:
     if streaming:
-        if cap is None or not cap.isOpened():
-            cap = cv2.VideoCapture(ESP32_STREAM_URL)
-            time.sleep(0.5)  # wait for stream to stabilize
+        if cap is None:
+            cap = open_capture()
 
-        ret, frame = cap.read()
-        if not ret:
+        frame = read_frame(cap)
+        if frame is None:
             print("❌ Failed to grab frame, retrying...")
-            if cap:
-                cap.release()
-                cap = None
-            time.sleep(1)
             continue
 
+        frame_index += 1
+        stream_stats.add()
+        if CONTINUOUS_DETECTION:
+            # Overlays go on the compositor canvas, so the captured frame stays clean
+            inference_worker.submit(frame_index, frame)
+
+        frame = compositor.compose(frame, current_commands_text)
         height, width = frame.shape[:2]
         frame_center = (width // 2, height // 2)
         cv2.circle(frame, frame_center, 5, (0, 0, 255), -1)
@@ -196,11 +211,14 @@ while True:
                 highlight_box = None
                 highlight_label = None
                 highlight_conf = None
+        elif CONTINUOUS_DETECTION:
+            cv2.putText(frame, f"Stream {stream_stats.fps:.1f} FPS | Detect {inference_worker.fps:.1f} FPS", (10, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
         else:
             cv2.putText(frame, "Press SPACE to detect", (10, 30),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
 
-        combined_frame = draw_commands_panel(frame, current_commands_text)
+        combined_frame = compositor.canvas
         cv2.imshow("YOLO Detection", combined_frame)
 
     else:
@@ -216,7 +234,7 @@ while True:
         # Toggle stream
         if streaming:
             if cap:
-                cap.release()
+                cap.stop()
                 cap = None
             if stop_stream():
                 streaming = False
@@ -237,20 +255,18 @@ while True:
             # If stream is off, start it first
             if start_stream():
                 streaming = True
-                time.sleep(1)  # give time to start stream
                 if cap:
-                    cap.release()
-                cap = cv2.VideoCapture(ESP32_STREAM_URL)
-                time.sleep(0.5)
+                    cap.stop()
+                cap = open_capture()
             else:
                 print("⚠️ Could not start stream for detection")
                 continue
 
         # Read a fresh frame for detection
-        if cap and cap.isOpened():
-            ret, frame_for_detection = cap.read()
-            if ret:
-                threading.Thread(target=run_detection_async, args=(frame_for_detection.copy(),), daemon=True).start()
+        if cap:
+            frame_for_detection = read_frame(cap, timeout=3.0)
+            if frame_for_detection is not None:
+                threading.Thread(target=run_detection_async, args=(frame_for_detection,), daemon=True).start()
             else:
                 print("❌ Failed to grab frame for detection")
         else:
@@ -265,9 +281,10 @@ while True:
             run_asyncio_task(send_command_async(highlight_label, cmd))
 
 # Cleanup
-# print("cap:", cap)    # when the stream is paused, cap is None, and thus has no release() attribute
+inference_worker.stop()
+# print("cap:", cap)    # when the stream is paused, cap is None, and thus has no stop() attribute
 if cap:
-    cap.release()
+    cap.stop()
 if streaming:
     stop_stream()
 cv2.destroyAllWindows()
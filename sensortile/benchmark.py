@@ -0,0 +1,66 @@
+import argparse
+import logging
+import time
+import numpy as np
+from sensortile.replay import recording_stream, synthetic_stream
+from sensortile.sensor_handler import SensorTileHandler
+
+# Throughput benchmark for SensorTileHandler, fed from replay streams:
+#   python -m sensortile.benchmark --rates 100 400 1000
+
+def run_benchmark(stream, handler=None):
+    """
+    Push a whole stream through handler.handle_notification as fast as possible
+    and report throughput, per-notification latency and gesture decisions.
+    """
+    handler = handler if handler is not None else SensorTileHandler()
+    origin = time.monotonic_ns()
+    timestamps = [origin + offset for offset, _ in stream]
+    latencies = np.empty(len(stream), dtype=np.int64)
+
+    start = time.perf_counter_ns()
+    for i, (timestamp, (_, packet)) in enumerate(zip(timestamps, stream)):
+        t0 = time.perf_counter_ns()
+        handler.handle_notification("benchmark", packet, timestamp)
+        latencies[i] = time.perf_counter_ns() - t0
+    elapsed = (time.perf_counter_ns() - start) / 1e9
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) / 1e3 if len(latencies) else (0.0, 0.0, 0.0)
+    return {
+        "samples": len(stream),
+        "seconds": elapsed,
+        "samples_per_sec": len(stream) / elapsed if elapsed else 0.0,
+        "p50_us": p50,
+        "p95_us": p95,
+        "p99_us": p99,
+        "max_us": latencies.max() / 1e3 if len(latencies) else 0.0,
+        "gestures": dict(handler.gesture_counts),
+    }
+
+
+def format_report(name, report):
+    return (
+        f"{name:>16} | {report['samples']:>8} samples | {report['samples_per_sec']:>10.0f} samples/s | "
+        f"p50 {report['p50_us']:7.1f} us  p95 {report['p95_us']:7.1f} us  p99 {report['p99_us']:7.1f} us  "
+        f"max {report['max_us']:8.1f} us | gestures {report['gestures']}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the SensorTile handler without BLE hardware")
+    parser.add_argument("--recording", action="append", default=[], help="SessionRecorder directory to include (repeatable)")
+    parser.add_argument("--duration", type=float, default=60.0, help="synthetic stream length in seconds")
+    parser.add_argument("--rates", type=float, nargs="+", default=[100.0, 400.0], help="synthetic sample rates in Hz")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario; the fastest is reported")
+    parser.add_argument("--verbose", action="store_true", help="keep handler INFO logging enabled while timing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s [%(levelname)s] %(message)s")
+
+    scenarios = [(f"synthetic@{rate:g}Hz", synthetic_stream(args.duration, rate)) for rate in args.rates]
+    scenarios += [(path, recording_stream(path)) for path in args.recording]
+
+    for name, stream in scenarios:
+        reports = [run_benchmark(stream) for _ in range(args.repeat)]
+        print(format_report(name, max(reports, key=lambda report: report["samples_per_sec"])))
@@ -0,0 +1,256 @@
+from collections import deque
+import numpy as np
+from sensortile.movement_detection import SlidingExtrema
+from sensortile.ring_buffer import SensorWindow
+
+AXES = ("yaw", "pitch", "roll")
+WRAPPED_AXES = ("yaw",)  # headings on a 0-360 circle
+
+class FeatureStore:
+    """
+    Rolling per-axis features shared by every registered gesture: window
+    min/max/range, latest value, angular velocity (deg/s) and the number of
+    velocity zero-crossings inside the window. Each feature is updated once per
+    sample no matter how many gestures read it. The raw samples of the window
+    are kept in a SensorWindow, so gestures that need the whole window read
+    NumPy views of it (window["pitch"]) instead of keeping their own history.
+    Wrapped axes (yaw) are unwrapped before they reach the extrema, so a turn
+    across north reads as the few degrees it is; their min/max may leave 0-360.
+    """
+    def __init__(self, window_ns, axes=AXES):
+        self.window_ns = int(window_ns)
+        self.axes = tuple(axes)
+        self.window = SensorWindow(window_ns, columns=self.axes + ("vafe",))
+        self.extrema = {axis: SlidingExtrema(window_ns) for axis in self.axes}
+        self.latest = dict.fromkeys(self.axes, 0.0)
+        self._unwrapped = dict.fromkeys(self.axes, 0.0)
+        self.velocity = dict.fromkeys(self.axes, 0.0)
+        self.vafe = 0.0
+        self.timestamp = None
+        self._crossings = {axis: deque() for axis in self.axes}
+
+    def __len__(self):
+        return len(self.window)
+
+    def range(self, axis):
+        extrema = self.extrema[axis]
+        return extrema.max - extrema.min
+
+    def zero_crossings(self, axis):
+        return len(self._crossings[axis])
+
+    def update(self, timestamp, values, vafe):
+        """Scalar path: derive velocity and crossings for one sample, then push it."""
+        velocities = []
+        crossed = []
+        dt = (timestamp - self.timestamp) / 1e9 if self.timestamp is not None else 0.0
+        for axis, value in zip(self.axes, values):
+            delta = value - self.latest[axis]
+            if axis in WRAPPED_AXES:
+                delta = (delta + 180.0) % 360.0 - 180.0
+            velocity = delta / dt if dt > 0 else 0.0
+            crossed.append(self.velocity[axis] * velocity < 0)
+            velocities.append(velocity)
+        self._push(timestamp, values, vafe, velocities, crossed)
+
+    def update_batch(self, timestamps, columns, vafe):
+        """
+        Batched path: velocities and crossings for a whole batch are computed in
+        one vectorized pass. Yields after each sample is pushed so callers can
+        evaluate gestures per sample.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        if not len(timestamps):
+            return
+        previous = self.timestamp if self.timestamp is not None else timestamps[0]
+        dt = np.diff(timestamps, prepend=previous) / 1e9
+
+        velocities = []
+        crossed = []
+        for axis, column in zip(self.axes, columns):
+            column = np.asarray(column, dtype=np.float64)
+            delta = np.diff(column, prepend=self.latest[axis] if self.timestamp is not None else column[0])
+            if axis in WRAPPED_AXES:
+                delta = (delta + 180.0) % 360.0 - 180.0
+            velocity = np.divide(delta, dt, out=np.zeros_like(delta), where=dt > 0)
+            previous_velocity = np.concatenate(([self.velocity[axis]], velocity[:-1]))
+            crossed.append((previous_velocity * velocity < 0).tolist())
+            velocities.append(velocity.tolist())
+
+        rows = zip(timestamps.tolist(), zip(*(np.asarray(c).tolist() for c in columns)),
+                   np.asarray(vafe).tolist(), zip(*velocities), zip(*crossed))
+        for timestamp, values, sample_vafe, sample_velocities, sample_crossed in rows:
+            self._push(timestamp, values, sample_vafe, sample_velocities, sample_crossed)
+            yield
+
+    def _push(self, timestamp, values, vafe, velocities, crossed):
+        self.window.append(timestamp, *values, vafe)
+        cutoff = timestamp - self.window_ns
+        for axis, value, velocity, crossing in zip(self.axes, values, velocities, crossed):
+            unwrapped = value
+            if axis in WRAPPED_AXES and self.timestamp is not None:
+                unwrapped = self._unwrapped[axis] + (value - self.latest[axis] + 180.0) % 360.0 - 180.0
+            self.extrema[axis].push(timestamp, unwrapped)
+            self._unwrapped[axis] = unwrapped
+            self.latest[axis] = value
+            self.velocity[axis] = velocity
+            crossings = self._crossings[axis]
+            if crossing:
+                crossings.append(timestamp)
+            while crossings and crossings[0] <= cutoff:
+                crossings.popleft()
+        self.vafe = vafe
+        self.timestamp = timestamp
+
+
+class Gesture:
+    """A detector evaluated against the shared FeatureStore once per sample."""
+    name = None
+
+    def update(self, features):
+        return False
+
+    def reset(self):
+        pass
+
+
+class NodUp(Gesture):
+    """Pitch swung by min_amplitude in the window and has dropped that far back from its peak."""
+    name = "nod_up"
+
+    def __init__(self, min_amplitude):
+        self.min_amplitude = min_amplitude
+
+    def update(self, features):
+        if len(features) < 3 or features.range("pitch") < self.min_amplitude:
+            return False
+        return features.extrema["pitch"].max - features.latest["pitch"] > self.min_amplitude
+
+
+class NodDown(Gesture):
+    """Pitch swung by min_amplitude in the window and has risen that far back from its dip."""
+    name = "nod_down"
+
+    def __init__(self, min_amplitude):
+        self.min_amplitude = min_amplitude
+
+    def update(self, features):
+        if len(features) < 3 or features.range("pitch") < self.min_amplitude:
+            return False
+        return features.latest["pitch"] - features.extrema["pitch"].min > self.min_amplitude
+
+
+class Roll(Gesture):
+    """Roll swung by at least min_amplitude inside the window."""
+    name = "roll"
+
+    def __init__(self, min_amplitude):
+        self.min_amplitude = min_amplitude
+
+    def update(self, features):
+        return len(features) >= 3 and features.range("roll") >= self.min_amplitude
+
+
+class Shake(Gesture):
+    """Head shake: wide yaw range with several yaw direction reversals."""
+    name = "shake"
+
+    def __init__(self, min_amplitude, min_reversals=3):
+        self.min_amplitude = min_amplitude
+        self.min_reversals = min_reversals
+
+    def update(self, features):
+        return (features.range("yaw") >= self.min_amplitude
+                and features.zero_crossings("yaw") >= self.min_reversals)
+
+
+class DoubleNod(Gesture):
+    """Two separate nod-up onsets no more than max_gap_ns apart."""
+    name = "double_nod"
+
+    def __init__(self, min_amplitude, max_gap_ns):
+        self.nod = NodUp(min_amplitude)
+        self.max_gap_ns = max_gap_ns
+        self._nodding = False
+        self._last_onset = None
+
+    def update(self, features):
+        nodding = self.nod.update(features)
+        onset = nodding and not self._nodding
+        self._nodding = nodding
+        if not onset:
+            return False
+        if self._last_onset is not None and features.timestamp - self._last_onset <= self.max_gap_ns:
+            self._last_onset = None
+            return True
+        self._last_onset = features.timestamp
+        return False
+
+    def reset(self):
+        self._nodding = False
+        self._last_onset = None
+
+
+class TiltHold(Gesture):
+    """Head held tilted (|roll| >= min_angle) for hold_ns; fires once per hold."""
+    name = "tilt_hold"
+
+    def __init__(self, min_angle, hold_ns):
+        self.min_angle = min_angle
+        self.hold_ns = hold_ns
+        self._since = None
+        self._fired = False
+
+    def update(self, features):
+        if abs(features.latest["roll"]) < self.min_angle:
+            self._since = None
+            self._fired = False
+            return False
+        if self._since is None:
+            self._since = features.timestamp
+        if not self._fired and features.timestamp - self._since >= self.hold_ns:
+            self._fired = True
+            return True
+        return False
+
+    def reset(self):
+        self._since = None
+        self._fired = False
+
+
+class GestureEngine:
+    """
+    Runs every registered Gesture against one shared FeatureStore, so adding a
+    gesture costs one cheap decision per sample rather than another window scan.
+    """
+    def __init__(self, window_ns):
+        self.features = FeatureStore(window_ns)
+        self.gestures = []
+
+    def register(self, gesture):
+        self.gestures.append(gesture)
+        return gesture
+
+    def update(self, timestamp, yaw, pitch, roll, vafe):
+        """Push one sample and return the names of the gestures that fired."""
+        self.features.update(timestamp, (yaw, pitch, roll), vafe)
+        return self._evaluate()
+
+    def update_batch(self, timestamps, samples):
+        """
+        Push a decoded batch, yielding the fired gesture names for each sample.
+        Samples are pushed lazily, one per step, so a caller that stops early
+        leaves the rest of the batch unpushed.
+        """
+        columns = [samples[axis] for axis in self.features.axes]
+        for _ in self.features.update_batch(timestamps, columns, samples["vafe"]):
+            yield self._evaluate()
+
+    def _evaluate(self):
+        features = self.features
+        return [gesture.name for gesture in self.gestures if gesture.update(features)]
+
+    def reset(self):
+        self.features = FeatureStore(self.features.window_ns, self.features.axes)
+        for gesture in self.gestures:
+            gesture.reset()
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import os
+import time
+from bleak import BleakClient
+from sensortile.pipeline import NotificationPipeline
+from sensortile.recorder import SessionRecorder
+from sensortile.sensor_handler import SensorTileHandler
+from utils.constants import (
+    CHARACTERISTIC_01, CHARACTERISTIC_02, RECONNECT_INITIAL_DELAY, RECONNECT_MAX_DELAY,
+    SAVE_LOGS, THROUGHPUT_REPORT_INTERVAL,
+)
+
+class DeviceSession:
+    """
+    One SensorTile: its handler, notification pipeline and connection counters.
+    With a recording_root the session is recorded, starting at the first
+    successful connect so devices that never come up leave no thread or file.
+    """
+    def __init__(self, address, recording_root=None):
+        self.address = address
+        self.recording_root = recording_root
+        self.recorder = None
+        self.handler = SensorTileHandler()
+        self.pipeline = NotificationPipeline(self.handler)
+        self.connected = False
+        self.connects = 0
+        self.failures = 0
+
+    def start_recording(self):
+        if self.recording_root is None or self.recorder is not None:
+            return
+        directory = os.path.join(self.recording_root, self.address.replace(":", "").replace("-", ""))
+        self.recorder = SessionRecorder.new_session(directory).start()
+        self.handler.recorder = self.recorder
+
+    def close(self):
+        if self.recorder is not None:
+            self.handler.recorder = None
+            self.recorder.close()
+            self.recorder = None
+
+
+class ConnectionManager:
+    """
+    Connects to several SensorTiles concurrently under one event loop, with one
+    handler/pipeline per device. Each device reconnects on its own with
+    exponential backoff, and aggregate throughput is logged periodically.
+    """
+    def __init__(self, addresses, recording_root=None):
+        self.sessions = [DeviceSession(address, recording_root) for address in addresses]
+
+    async def run(self):
+        tasks = [asyncio.create_task(session.pipeline.supervise()) for session in self.sessions]
+        tasks += [asyncio.create_task(self._run_device(session)) for session in self.sessions]
+        tasks.append(asyncio.create_task(self._report()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for session in self.sessions:
+                logging.info(f"[{session.address}] Pipeline stats: {session.pipeline.stats()}")
+                session.close()
+
+    async def _run_device(self, session):
+        delay = RECONNECT_INITIAL_DELAY
+        while True:
+            disconnected = asyncio.Event()
+            try:
+                logging.info(f"[{session.address}] Connecting to SensorTile...")
+                async with BleakClient(session.address, timeout=60,
+                                       disconnected_callback=lambda client: disconnected.set()) as client:
+                    session.start_recording()
+                    await self._start_streaming(session, client)
+                    session.connected = True
+                    session.connects += 1
+                    delay = RECONNECT_INITIAL_DELAY
+                    await disconnected.wait()
+                logging.warning(f"[{session.address}] Disconnected.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                session.failures += 1
+                logging.error(f"[{session.address}] Connection failed: {e}")
+            finally:
+                session.connected = False
+
+            logging.info(f"[{session.address}] Reconnecting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _start_streaming(self, session, client):
+        logging.info(f"[{session.address}] Connected to SensorTile.")
+        if SAVE_LOGS:
+            for service in client.services:
+                for char in service.characteristics:
+                    logging.info(f"[{session.address}] {char.uuid} -> {char.properties}")
+
+        await client.start_notify(CHARACTERISTIC_01, session.pipeline.callback)
+        await client.start_notify(CHARACTERISTIC_02, session.pipeline.callback)
+
+        if SAVE_LOGS:
+            logging.info(f"[{session.address}] Sending start command...")
+        await client.write_gatt_char(CHARACTERISTIC_02, bytearray([0x32, 0x01, 0x0A]), response=False)
+        logging.info(f"[{session.address}] Begin streaming...")
+
+    async def _report(self):
+        previous = {session.address: 0 for session in self.sessions}
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(THROUGHPUT_REPORT_INTERVAL)
+            now = time.monotonic()
+            elapsed = now - last
+            last = now
+
+            total = 0
+            parts = []
+            for session in self.sessions:
+                processed = session.pipeline.processed
+                rate = (processed - previous[session.address]) / elapsed
+                previous[session.address] = processed
+                total += rate
+                state = "up" if session.connected else "down"
+                parts.append(f"{session.address} {state} {rate:.1f}/s drop={session.pipeline.dropped}")
+            connected = sum(session.connected for session in self.sessions)
+            logging.info(f"Throughput {total:.1f} samples/s across {connected}/{len(self.sessions)} devices | " + ", ".join(parts))
@@ -1,64 +1,47 @@
-import numpy as np
+from collections import deque
 
-def detect_nod_up(df, min_amplitude):
-    """
-    Detects a nod based on a significant up and down movement in pitch.
-    Ensures that the pitch returns toward the other extreme.
-    """
-    pitch = df["pitch"].values
-    if len(pitch) < 3:
-        return False
-
-    pitch_max = np.max(pitch)
-    pitch_min = np.min(pitch)
-    delta = pitch_max - pitch_min
-
-    if delta < min_amplitude:
-        return False
-
-    # Confirm that the movement returned toward the opposite extreme
-    latest_pitch = pitch[-1]
 
-    if pitch_max - latest_pitch > min_amplitude:
-        return True
-
-    return False
-
-
-def detect_nod_down(df, min_amplitude):
+class SlidingExtrema:
     """
-    Detects a nod based on a significant down and up movement in pitch.
-    Ensures that the pitch returns toward the other extreme.
+    Sliding-window min/max over timestamped samples using monotonic deques.
+    Each push is amortized O(1) regardless of how many samples the window holds.
     """
-    pitch = df["pitch"].values
-    if len(pitch) < 3:
-        return False
-
-    pitch_max = np.max(pitch)
-    pitch_min = np.min(pitch)
-    delta = pitch_max - pitch_min
-
-    if delta < min_amplitude:
-        return False
-
-    # Confirm that the movement returned toward the opposite extreme
-    latest_pitch = pitch[-1]
-
-    if latest_pitch - pitch_min > min_amplitude:
-        return True
-
-    return False
-
-def detect_roll(df, min_amplitude):
-    roll = df["roll"].values
-    if len(roll) < 3:
-        return False
-
-    roll_max = np.max(roll)
-    roll_min = np.min(roll)
-    delta = roll_max - roll_min
-
-    if delta < min_amplitude:
-        return False
-
-    return True
+    def __init__(self, window_ns):
+        self.window_ns = int(window_ns)
+        self._timestamps = deque()
+        self._max = deque()  # (timestamp, value), values strictly decreasing
+        self._min = deque()  # (timestamp, value), values strictly increasing
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    @property
+    def max(self):
+        return self._max[0][1]
+
+    @property
+    def min(self):
+        return self._min[0][1]
+
+    def push(self, timestamp, value):
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((timestamp, value))
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((timestamp, value))
+        self._timestamps.append(timestamp)
+
+        # Same window as SensorWindow: keep samples with timestamp > latest - window
+        cutoff = timestamp - self.window_ns
+        while self._timestamps[0] <= cutoff:
+            self._timestamps.popleft()
+        while self._max[0][0] <= cutoff:
+            self._max.popleft()
+        while self._min[0][0] <= cutoff:
+            self._min.popleft()
+
+    def reset(self):
+        self._timestamps.clear()
+        self._max.clear()
+        self._min.clear()
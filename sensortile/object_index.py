@@ -0,0 +1,76 @@
+import numpy as np
+
+def angular_distance(yaw1, pitch1, yaw2, pitch2):
+    """Yaw-wrapped euclidean distance in degrees; broadcasts over NumPy arrays."""
+    yaw1 = np.mod(yaw1, 360)
+    yaw2 = np.mod(yaw2, 360)
+
+    dyaw = np.abs(yaw1 - yaw2)
+    dyaw = np.minimum(dyaw, 360 - dyaw)
+
+    dpitch = np.abs(pitch1 - pitch2)
+
+    return np.sqrt(dyaw**2 + dpitch**2)
+
+
+class ObjectIndex:
+    """
+    Registered object view positions kept in contiguous arrays, so a lookup is a
+    single vectorized distance pass plus a partial sort for the k nearest.
+    """
+    def __init__(self, capacity=16):
+        self.items = []
+        self._yaw = np.empty(capacity, dtype=np.float64)
+        self._pitch = np.empty(capacity, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def yaw(self):
+        return self._yaw[:len(self)]
+
+    @property
+    def pitch(self):
+        return self._pitch[:len(self)]
+
+    def add(self, item, yaw, pitch):
+        n = len(self)
+        if n == len(self._yaw):
+            capacity = max(1, 2 * n)
+            self._yaw = np.resize(self._yaw, capacity)
+            self._pitch = np.resize(self._pitch, capacity)
+        self._yaw[n] = yaw
+        self._pitch[n] = pitch
+        self.items.append(item)
+
+    def clear(self):
+        self.items = []
+
+    def distances(self, yaw, pitch):
+        return angular_distance(yaw, pitch, self.yaw, self.pitch)
+
+    def nearest(self, yaw, pitch, k=1, max_angle=None):
+        """
+        Return up to k registered objects closest to (yaw, pitch), nearest first,
+        as dicts with item, yaw, pitch and distance. Objects farther than
+        max_angle degrees are skipped.
+        """
+        if not len(self) or k <= 0:
+            return []
+
+        distances = self.distances(yaw, pitch)
+        if k == 1:
+            candidates = np.array([np.argmin(distances)])
+        elif k < len(distances):
+            candidates = np.argpartition(distances, k - 1)[:k]
+        else:
+            candidates = np.arange(len(distances))
+        order = candidates[np.argsort(distances[candidates], kind="stable")]
+        if max_angle is not None:
+            order = order[distances[order] <= max_angle]
+
+        return [
+            {"item": self.items[i], "yaw": float(self._yaw[i]), "pitch": float(self._pitch[i]), "distance": float(distances[i])}
+            for i in order
+        ]
@@ -0,0 +1,66 @@
+import struct
+from functools import lru_cache
+import numpy as np
+
+# SensorTile notification layout (little-endian float32 fields)
+POSE_OFFSET = 33    # yaw, pitch, roll
+VAFE_OFFSET = 61
+MIN_PACKET_SIZE = VAFE_OFFSET + 4
+
+POSE_STRUCT = struct.Struct("<fff")
+VAFE_STRUCT = struct.Struct("<f")
+
+SAMPLE_FIELDS = ["yaw", "pitch", "roll", "vafe"]
+SAMPLE_OFFSETS = [POSE_OFFSET, POSE_OFFSET + 4, POSE_OFFSET + 8, VAFE_OFFSET]
+SAMPLE_DTYPE = np.dtype([(name, "<f4") for name in SAMPLE_FIELDS])
+
+def decode_packet(data):
+    """Decode (yaw, pitch, roll, vafe) from one notification without slicing copies."""
+    yaw, pitch, roll = POSE_STRUCT.unpack_from(data, POSE_OFFSET)
+    vafe, = VAFE_STRUCT.unpack_from(data, VAFE_OFFSET)
+    return yaw, pitch, roll, vafe
+
+
+@lru_cache(maxsize=None)
+def packet_dtype(size):
+    """Structured dtype that views a whole packet of `size` bytes as one record."""
+    if size < MIN_PACKET_SIZE:
+        raise ValueError(f"SensorTile packet must be at least {MIN_PACKET_SIZE} bytes, got {size}")
+    return np.dtype({
+        "names": SAMPLE_FIELDS,
+        "formats": ["<f4"] * len(SAMPLE_FIELDS),
+        "offsets": SAMPLE_OFFSETS,
+        "itemsize": size,
+    })
+
+
+def decode_buffer(buffer, size):
+    """View a buffer of back-to-back `size`-byte packets as a record array (zero-copy)."""
+    return np.frombuffer(buffer, dtype=packet_dtype(size))
+
+
+def decode_batch(packets):
+    """
+    Decode a list of queued notifications into a record array with
+    yaw/pitch/roll/vafe fields. Equal-length packets (the normal case) are
+    joined once and decoded with a single np.frombuffer call.
+    """
+    if not packets:
+        return np.empty(0, dtype=SAMPLE_DTYPE)
+
+    size = len(packets[0])
+    if all(len(packet) == size for packet in packets):
+        return decode_buffer(b"".join(packets), size)
+
+    for packet in packets:
+        if len(packet) < MIN_PACKET_SIZE:
+            raise ValueError(f"SensorTile packet must be at least {MIN_PACKET_SIZE} bytes, got {len(packet)}")
+    return np.array([decode_packet(packet) for packet in packets], dtype=SAMPLE_DTYPE)
+
+
+def encode_packet(yaw, pitch, roll, vafe, size=MIN_PACKET_SIZE):
+    """Build a notification payload with the SensorTile layout (used by replay and tests)."""
+    packet = bytearray(size)
+    POSE_STRUCT.pack_into(packet, POSE_OFFSET, yaw, pitch, roll)
+    VAFE_STRUCT.pack_into(packet, VAFE_OFFSET, vafe)
+    return bytes(packet)
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import time
+from sensortile.packet import MIN_PACKET_SIZE, decode_batch, decode_packet
+from sensortile.sensor_handler import BatchInterrupted
+from utils.constants import PIPELINE_BATCH_SIZE, PIPELINE_QUEUE_SIZE, PIPELINE_RESTART_DELAY, PIPELINE_WORKER_THREAD
+
+class NotificationPipeline:
+    """
+    Decouples the bleak notification callback from gesture processing.
+    callback() only stamps the raw payload with time.monotonic_ns() and puts it
+    on a bounded queue; run() drains the queue in batches, decodes each batch
+    with one decode_batch call and hands the samples to the handler, optionally
+    on a worker thread so detection never blocks the event loop.
+    When the queue is full the oldest queued notification is dropped. If a
+    batch fails, the failing sample is skipped and the rest of the batch is
+    processed sample by sample, so one bad sample only loses itself and no
+    sample is applied twice. supervise() restarts run() if the consumer dies.
+    """
+    def __init__(self, handler, maxsize=PIPELINE_QUEUE_SIZE, batch_size=PIPELINE_BATCH_SIZE, use_thread=PIPELINE_WORKER_THREAD):
+        self.handler = handler
+        self.batch_size = batch_size
+        self.use_thread = use_thread
+        self.queue = asyncio.Queue(maxsize)
+        self.received = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.failed = 0
+        self.processed = 0
+        self.restarts = 0
+        self.batches = 0
+        self.high_water = 0
+
+    def callback(self, sender, data):
+        self.received += 1
+        item = (time.monotonic_ns(), data)
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.queue.get_nowait()
+            self.queue.put_nowait(item)
+            self.dropped += 1
+        depth = self.queue.qsize()
+        if depth > self.high_water:
+            self.high_water = depth
+
+    async def supervise(self):
+        while True:
+            try:
+                await self.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.restarts += 1
+                logging.exception(f"Notification consumer crashed, restarting: {e}")
+                await asyncio.sleep(PIPELINE_RESTART_DELAY)
+
+    async def run(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            if self.use_thread:
+                await asyncio.to_thread(self.process, batch)
+            else:
+                self.process(batch)
+
+    def process(self, batch):
+        timestamps = []
+        packets = []
+        for timestamp, data in batch:
+            if len(data) >= MIN_PACKET_SIZE:
+                timestamps.append(timestamp)
+                packets.append(data)
+        self.rejected += len(batch) - len(packets)
+
+        try:
+            applied = self.handler.process_batch(timestamps, decode_batch(packets))
+        except BatchInterrupted as e:
+            # Samples before e.applied are done and the failing one may be half applied
+            logging.error(f"Error processing batch at {e}, continuing per sample")
+            self.failed += 1
+            resume = e.applied + 1
+            applied = e.applied + self.process_samples(timestamps[resume:], packets[resume:])
+        except Exception as e:
+            # Raised before any sample was pushed (e.g. by decode_batch)
+            logging.error(f"Error processing batch, retrying per sample: {e}")
+            applied = self.process_samples(timestamps, packets)
+        self.processed += applied
+        self.batches += 1
+
+    def process_samples(self, timestamps, packets):
+        """Per-sample fallback; returns how many samples were applied."""
+        applied = 0
+        for timestamp, data in zip(timestamps, packets):
+            try:
+                self.handler.process_sample(timestamp, *decode_packet(data))
+                applied += 1
+            except Exception as e:
+                self.failed += 1
+                logging.error(f"Error processing sample: {e}")
+        return applied
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "batches": self.batches,
+            "queued": self.queue.qsize(),
+            "high_water": self.high_water,
+        }
@@ -0,0 +1,156 @@
+import glob
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from utils.constants import RECORDING_CHUNK_RECORDS, RECORDING_FLUSH_INTERVAL, RECORDING_MAX_BACKLOG
+
+# One fixed-size little-endian record per decoded sample (24 bytes)
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<i8"),
+    ("yaw", "<f4"),
+    ("pitch", "<f4"),
+    ("roll", "<f4"),
+    ("vafe", "<f4"),
+])
+CHUNK_PATTERN = "chunk_{:05d}.bin"
+
+class SessionRecorder:
+    """
+    Append-only session recorder. append() only queues the sample in memory; a
+    background thread packs queued samples into RECORD_DTYPE records and appends
+    them to chunked .bin files, so the BLE callback never touches the disk.
+    Samples that fail to write stay buffered (up to max_backlog, oldest dropped
+    first and counted in records_dropped) and are retried on the next flush.
+    """
+    def __init__(self, directory, chunk_records=RECORDING_CHUNK_RECORDS, flush_interval=RECORDING_FLUSH_INTERVAL,
+                 max_backlog=RECORDING_MAX_BACKLOG):
+        self.directory = directory
+        self.chunk_records = chunk_records
+        self.flush_interval = flush_interval
+        self.max_backlog = max_backlog
+        self.records_written = 0
+        self.records_dropped = 0
+        self._pending = deque()
+        self._unwritten = np.empty(0, dtype=RECORD_DTYPE)
+        self._chunk_index = 0
+        self._chunk_fill = 0
+        self._file = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="SessionRecorder", daemon=True)
+
+    @classmethod
+    def new_session(cls, root, **kwargs):
+        """Create a recorder writing into a fresh timestamped directory under root."""
+        directory = os.path.join(root, datetime.now().strftime("session_%Y%m%d_%H%M%S"))
+        return cls(directory, **kwargs)
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread.start()
+        logging.info(f"Recording session to {self.directory}")
+        return self
+
+    def append(self, timestamp, yaw, pitch, roll, vafe):
+        self._pending.append((timestamp, yaw, pitch, roll, vafe))
+
+    def close(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._try_flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        lost = self.records_dropped + len(self._unwritten) + len(self._pending)
+        if lost:
+            logging.error(f"{lost} samples could not be written to {self.directory}")
+        logging.info(f"Saved {self.records_written} samples to {self.directory}")
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._try_flush()
+
+    def _try_flush(self):
+        try:
+            self._flush()
+        except OSError as e:
+            logging.error(f"Error writing recording: {e}")
+            self._abandon_chunk()
+
+    def _flush(self):
+        # Only this thread pops, so the length snapshot is safe against concurrent appends
+        count = len(self._pending)
+        if count:
+            records = np.array([self._pending.popleft() for _ in range(count)], dtype=RECORD_DTYPE)
+            self._unwritten = np.concatenate((self._unwritten, records)) if len(self._unwritten) else records
+        overflow = len(self._unwritten) - self.max_backlog
+        if overflow > 0:
+            self.records_dropped += overflow
+            self._unwritten = self._unwritten[overflow:]
+            logging.error(f"Recording backlog full, dropped the {overflow} oldest samples")
+
+        # Records leave the buffer only once flushed to the file, so a failed write or flush is retried
+        while len(self._unwritten):
+            if self._file is None or self._chunk_fill == self.chunk_records:
+                self._open_next_chunk()
+            part = self._unwritten[:self.chunk_records - self._chunk_fill]
+            self._file.write(part.tobytes())
+            self._file.flush()
+            self._chunk_fill += len(part)
+            self.records_written += len(part)
+            self._unwritten = self._unwritten[len(part):]
+
+    def _abandon_chunk(self):
+        # Cut the chunk back to its flushed records so a retried part is not stored twice;
+        # retries go to a fresh chunk
+        if self._file is not None:
+            path = self._file.name
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            try:
+                os.truncate(path, self._chunk_fill * RECORD_DTYPE.itemsize)
+            except OSError:
+                pass
+            self._file = None
+            self._chunk_index += 1
+
+    def _open_next_chunk(self):
+        if self._file is not None:
+            self._file.close()
+            self._chunk_index += 1
+        self._file = open(os.path.join(self.directory, CHUNK_PATTERN.format(self._chunk_index)), "ab")
+        self._chunk_fill = 0
+
+
+def open_chunks(directory):
+    """Memory-map every chunk of a recording, in order, as read-only RECORD_DTYPE arrays."""
+    chunks = []
+    for path in sorted(glob.glob(os.path.join(directory, "chunk_*.bin"))):
+        # A partially written trailing record (e.g. after a crash) is ignored
+        count = os.path.getsize(path) // RECORD_DTYPE.itemsize
+        if count:
+            chunks.append(np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(count,)))
+    return chunks
+
+
+def load_recording(directory):
+    """Return the whole recording; zero-copy when it fits in a single chunk."""
+    chunks = open_chunks(directory)
+    if not chunks:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    if len(chunks) == 1:
+        return chunks[0]
+    return np.concatenate(chunks)
+
+
+def to_frame(records):
+    """Convert recorded samples into a DataFrame shaped like the old CSV log (monotonic timestamps as timedeltas)."""
+    frame = pd.DataFrame({name: records[name] for name in RECORD_DTYPE.names if name != "timestamp"})
+    frame.insert(0, "timestamp", pd.to_timedelta(records["timestamp"], unit="ns"))
+    return frame
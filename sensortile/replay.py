@@ -0,0 +1,95 @@
+import argparse
+import logging
+import time
+import numpy as np
+from sensortile.packet import encode_packet
+from sensortile.recorder import load_recording
+from sensortile.sensor_handler import SensorTileHandler
+
+# Offline replay of SensorTile notification streams. A stream is an iterable of
+# (offset_ns, packet) pairs, where offset_ns is the time since the first packet.
+
+def _bump(t, start, width):
+    """Triangle pulse rising 0 -> 1 -> 0 over [start, start + width]."""
+    phase = (t - start) / width
+    return np.clip(1 - np.abs(2 * phase - 1), 0, None)
+
+
+def synthetic_motion(duration=30.0, rate_hz=100.0, seed=0):
+    """
+    Generate a head-motion trace: three rolls (setup, one per connected object at
+    yaw 0/120/240) followed by nods toward those objects, 4 s apart so each one
+    clears NOD_COOLDOWN. Returns (timestamps_ns, yaw, pitch, roll, vafe) arrays.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(duration * rate_hz)
+    t = np.arange(n) / rate_hz
+    heading = np.zeros(n)
+    pitch = rng.normal(0, 1.0, n)
+    roll = rng.normal(0, 1.0, n)
+    vafe = rng.normal(0, 1.0, n)
+
+    for i, start in enumerate(np.arange(1.0, duration - 1.5, 4.0)):
+        heading[t >= start - 1.0] = 120.0 * (i % 3)
+        if i < 3:
+            roll += 40.0 * _bump(t, start, 1.0)
+        else:
+            pitch += 90.0 * _bump(t, start, 0.6)
+
+    yaw = (heading + rng.normal(0, 0.5, n)) % 360
+    timestamps = np.round(t * 1e9).astype(np.int64)
+    return timestamps, yaw, pitch, roll, vafe
+
+
+def synthetic_stream(duration=30.0, rate_hz=100.0, seed=0):
+    timestamps, yaw, pitch, roll, vafe = synthetic_motion(duration, rate_hz, seed)
+    return [
+        (int(ts), encode_packet(*sample))
+        for ts, sample in zip(timestamps, zip(yaw, pitch, roll, vafe))
+    ]
+
+
+def recording_stream(directory):
+    """Re-encode a SessionRecorder recording as a notification stream."""
+    records = load_recording(directory)
+    if not len(records):
+        return []
+    offsets = records["timestamp"] - records["timestamp"][0]
+    return [
+        (int(offset), encode_packet(record["yaw"], record["pitch"], record["roll"], record["vafe"]))
+        for offset, record in zip(offsets, records)
+    ]
+
+
+def replay(handler, stream, speed=1.0, sender="replay"):
+    """
+    Feed a stream into handler.handle_notification. speed=1.0 is real time,
+    other values scale it, and speed=None runs as fast as possible. The handler
+    always sees the stream's own timing, whatever the replay speed.
+    """
+    origin = time.monotonic_ns()
+    wall_start = time.perf_counter_ns()
+    count = 0
+    for offset, packet in stream:
+        if speed:
+            delay = offset / speed - (time.perf_counter_ns() - wall_start)
+            if delay > 0:
+                time.sleep(delay / 1e9)
+        handler.handle_notification(sender, packet, origin + offset)
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay SensorTile notifications without BLE hardware")
+    parser.add_argument("--recording", help="SessionRecorder directory to replay (default: synthetic motion)")
+    parser.add_argument("--duration", type=float, default=30.0, help="synthetic stream length in seconds")
+    parser.add_argument("--rate", type=float, default=100.0, help="synthetic sample rate in Hz")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed factor; 0 = as fast as possible")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    stream = recording_stream(args.recording) if args.recording else synthetic_stream(args.duration, args.rate)
+    handler = SensorTileHandler()
+    count = replay(handler, stream, speed=args.speed or None)
+    logging.info(f"Replayed {count} notifications, gestures: {dict(handler.gesture_counts)}")
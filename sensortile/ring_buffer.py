@@ -0,0 +1,67 @@
+import numpy as np
+from utils.constants import CSV_HEADERS, WINDOW_CAPACITY
+
+SENSOR_COLUMNS = [name for name in CSV_HEADERS if name != "timestamp"]
+
+class SensorWindow:
+    """
+    Fixed-capacity, time-windowed ring buffer of SensorTile samples.
+    Each sample is written twice (at i and i + capacity) so the live window is
+    always one contiguous slice: append and eviction are O(1) and reads are views.
+    """
+    def __init__(self, window_ns, capacity=WINDOW_CAPACITY, columns=SENSOR_COLUMNS):
+        self.window_ns = int(window_ns)
+        self.capacity = int(capacity)
+        self.columns = list(columns)
+        self._timestamps = np.zeros(2 * self.capacity, dtype=np.int64)
+        self._values = {name: np.zeros(2 * self.capacity, dtype=np.float64) for name in self.columns}
+        self._start = 0  # absolute index of the oldest sample still in the window
+        self._end = 0    # absolute index one past the newest sample
+
+    def __len__(self):
+        return self._end - self._start
+
+    def append(self, timestamp, *values):
+        """Add one sample (timestamp in int64 ns, values in column order) and evict expired ones."""
+        if self._end - self._start == self.capacity:
+            self._start += 1
+
+        pos = self._end % self.capacity
+        self._timestamps[pos] = self._timestamps[pos + self.capacity] = timestamp
+        for name, value in zip(self.columns, values):
+            column = self._values[name]
+            column[pos] = column[pos + self.capacity] = value
+        self._end += 1
+
+        cutoff = timestamp - self.window_ns
+        while self._start < self._end and self._timestamps[self._start % self.capacity] <= cutoff:
+            self._start += 1
+
+    def clear(self):
+        self._start = self._end = 0
+
+    def _slice(self):
+        pos = self._start % self.capacity
+        return slice(pos, pos + len(self))
+
+    @property
+    def timestamps(self):
+        return self._timestamps[self._slice()]
+
+    def __getitem__(self, name):
+        """Return a read-only view of one column over the current window."""
+        if name == "timestamp":
+            view = self.timestamps
+        else:
+            view = self._values[name][self._slice()]
+        view.flags.writeable = False
+        return view
+
+    def latest(self):
+        if not len(self):
+            return None
+        pos = (self._end - 1) % self.capacity
+        sample = {"timestamp": int(self._timestamps[pos])}
+        for name in self.columns:
+            sample[name] = float(self._values[name][pos])
+        return sample
@@ -1,74 +1,96 @@
-import numpy as np
-import pandas as pd
 import logging
-import os
-import struct
-from sensortile.movement_detection import detect_nod_up, detect_roll
-from utils.constants import CSV_HEADERS, NOD_TIME_WINDOW, NOD_MIN_AMPLITUDE, SAVE_LOGS, NOD_COOLDOWN, ROLL_MIN_AMPLITUDE
+import time
+from collections import Counter
+from sensortile.gestures import GestureEngine, NodUp, Roll
+from sensortile.object_index import ObjectIndex, angular_distance
+from sensortile.packet import MIN_PACKET_SIZE, decode_packet
+from utils.constants import NOD_TIME_WINDOW, NOD_MIN_AMPLITUDE, SAVE_LOGS, NOD_COOLDOWN, ROLL_MIN_AMPLITUDE, VIEW_MAX_ANGLE
+
+class BatchInterrupted(Exception):
+    """process_batch() failed on sample `applied`; the samples before it were fully applied."""
+    def __init__(self, applied, error):
+        super().__init__(f"sample {applied}: {error}")
+        self.applied = applied
+
 
 class SensorTileHandler:
-    def __init__(self):
-        self.data = pd.DataFrame(columns=CSV_HEADERS)
-        self.object_pos = pd.DataFrame(columns=["item", "yaw", "pitch"])
+    def __init__(self, recorder=None):
+        self.gestures = GestureEngine(NOD_TIME_WINDOW)
+        self.gestures.register(NodUp(NOD_MIN_AMPLITUDE))
+        self.gestures.register(Roll(ROLL_MIN_AMPLITUDE))
+        self.object_pos = ObjectIndex()
+        self.recorder = recorder
         self.last_nod_time = None
         self.setup = True
         self.connected_objects = ["phone", "light", "tv"]
         self.object_index = 0
+        self.gesture_counts = Counter()
 
-    def handle_notification(self, sender, data):
+    def handle_notification(self, sender, data, timestamp=None):
         if SAVE_LOGS:
             logging.info(f"\nNotification from {sender}:")
             logging.info(f"Hex: {data.hex()}")
             logging.info(f"Length: {len(data)} bytes")
 
-        if len(data) >= 45:
+        if len(data) >= MIN_PACKET_SIZE:
             try:
-                yaw, pitch, roll = struct.unpack("<fff", data[33:45])
-                vafe = struct.unpack("<f", data[61:65])[0]
-                timestamp = pd.Timestamp.now()
-
-                new_row = {"timestamp": timestamp, "yaw": yaw, "pitch": pitch, "roll": roll, "vafe": vafe}
-                self.data = pd.concat([self.data, pd.DataFrame([new_row])], ignore_index=True)
-                self.data = self.data[self.data["timestamp"] > timestamp - pd.Timedelta(seconds=NOD_TIME_WINDOW)]
+                yaw, pitch, roll, vafe = decode_packet(data)
+                if timestamp is None:
+                    timestamp = time.monotonic_ns()
 
-                if SAVE_LOGS:
-                    logging.info(f"Head Pose -> Yaw: {yaw:.2f}, Pitch: {pitch:.2f}, Roll: {roll:.2f}, Vafe: {vafe:.2f}")
-
-                if self.last_nod_time is None or (timestamp - self.last_nod_time) > NOD_COOLDOWN:
-                    if detect_nod_up(self.data, NOD_MIN_AMPLITUDE) and not self.setup:
-                        logging.info(f"The closest object position is the {self.find_closest_view(yaw, pitch)['item']}")
-                    elif self.setup and detect_roll(self.data, ROLL_MIN_AMPLITUDE):
-                        logging.info(f"Roll detected, saving {self.connected_objects[self.object_index]}'s position -> Yaw: {yaw:.2f}, Pitch: {pitch:.2f}")
-                        position = {"item": self.connected_objects[self.object_index], "yaw": yaw, "pitch": pitch}
-                        self.object_pos = pd.concat([self.object_pos, pd.DataFrame([position])], ignore_index=True)
-                        self.object_index += 1
-                        if self.object_index == len(self.connected_objects):
-                            self.setup = False
-                            logging.info("Setup complete")
-                    self.last_nod_time = timestamp
+                self.process_sample(timestamp, yaw, pitch, roll, vafe)
             except Exception as e:
                 logging.error(f"Error decoding data: {e}")
 
-    def save_log(self, path):
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        self.data.to_csv(path, index=False)
-        logging.info(f"Saved log to {path}")
-    
-    def angular_distance(self, yaw1, pitch1, yaw2, pitch2):
-        yaw1 = yaw1 % 360
-        yaw2 = yaw2 % 360
-        
-        dyaw = np.abs(yaw1 - yaw2)
-        dyaw = np.minimum(dyaw, 360 - dyaw)
+    def process_batch(self, timestamps, samples):
+        """
+        Process decoded samples (e.g. from decode_batch) in arrival order and
+        return how many were applied. Each sample is pushed and applied before
+        the next one is touched; a failure raises BatchInterrupted with the
+        index of the failing sample, so callers can resume after it.
+        """
+        columns = (samples["yaw"].tolist(), samples["pitch"].tolist(), samples["roll"].tolist(), samples["vafe"].tolist())
+        fired = self.gestures.update_batch(timestamps, samples)
+        applied = 0
+        try:
+            for timestamp, yaw, pitch, roll, vafe, gestures in zip(timestamps, *columns, fired):
+                self._apply(timestamp, yaw, pitch, roll, vafe, gestures)
+                applied += 1
+        except Exception as e:
+            raise BatchInterrupted(applied, e) from e
+        return applied
 
-        dpitch = np.abs(pitch1 - pitch2)
+    def process_sample(self, timestamp, yaw, pitch, roll, vafe):
+        """timestamp is int64 ns on a monotonic clock (time.monotonic_ns() unless replayed)."""
+        gestures = self.gestures.update(timestamp, yaw, pitch, roll, vafe)
+        self._apply(timestamp, yaw, pitch, roll, vafe, gestures)
 
-        return np.sqrt(dyaw**2 + dpitch**2)
+    def _apply(self, timestamp, yaw, pitch, roll, vafe, gestures):
+        if self.recorder is not None:
+            self.recorder.append(timestamp, yaw, pitch, roll, vafe)
+
+        if SAVE_LOGS:
+            logging.info(f"Head Pose -> Yaw: {yaw:.2f}, Pitch: {pitch:.2f}, Roll: {roll:.2f}, Vafe: {vafe:.2f}")
+
+        if self.last_nod_time is None or (timestamp - self.last_nod_time) > NOD_COOLDOWN:
+            if "nod_up" in gestures and not self.setup:
+                self.gesture_counts["nod"] += 1
+                closest = self.find_closest_view(yaw, pitch)
+                if closest is not None:
+                    logging.info(f"The closest object position is the {closest['item']}")
+            elif self.setup and "roll" in gestures:
+                self.gesture_counts["roll"] += 1
+                logging.info(f"Roll detected, saving {self.connected_objects[self.object_index]}'s position -> Yaw: {yaw:.2f}, Pitch: {pitch:.2f}")
+                self.object_pos.add(self.connected_objects[self.object_index], yaw, pitch)
+                self.object_index += 1
+                if self.object_index == len(self.connected_objects):
+                    self.setup = False
+                    logging.info("Setup complete")
+            self.last_nod_time = timestamp
+
+    def angular_distance(self, yaw1, pitch1, yaw2, pitch2):
+        return angular_distance(yaw1, pitch1, yaw2, pitch2)
 
-    def find_closest_view(self, new_yaw, new_pitch):
-        distances = self.object_pos.apply(
-            lambda row: self.angular_distance(new_yaw, new_pitch, row['yaw'], row['pitch']),
-            axis=1
-        )
-        closest_idx = distances.idxmin()
-        return self.object_pos.loc[closest_idx]
+    def find_closest_view(self, new_yaw, new_pitch, max_angle=VIEW_MAX_ANGLE):
+        closest = self.object_pos.nearest(new_yaw, new_pitch, k=1, max_angle=max_angle)
+        return closest[0] if closest else None
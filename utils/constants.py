@@ -1,13 +1,25 @@
-import pandas as pd
-
-CSV_FILE = "sensortile/logs/csv/sensor_data.csv"
+RECORDING_DIR = "sensortile/logs/recordings"
+RECORDING_CHUNK_RECORDS = 65536   # records per chunk file (24 bytes each)
+RECORDING_FLUSH_INTERVAL = 0.5    # seconds between background flushes
+RECORDING_MAX_BACKLOG = 262144    # unwritten records kept while the disk fails (~6 MB); older ones are dropped
 CSV_HEADERS = ["timestamp", "yaw", "pitch", "roll", "vafe"]
 SAVE_LOGS = False
 
 ROLL_MIN_AMPLITUDE = 20
 NOD_MIN_AMPLITUDE = 70
-NOD_TIME_WINDOW = 1.5   # seconds
-NOD_COOLDOWN = pd.Timedelta(seconds=2.0)
+NOD_TIME_WINDOW = 1_500_000_000   # ns (1.5 s)
+WINDOW_CAPACITY = 512             # samples kept at most; must exceed ODR * NOD_TIME_WINDOW
+NOD_COOLDOWN = 2_000_000_000      # ns (2.0 s)
+VIEW_MAX_ANGLE = None             # degrees; None always returns the nearest registered object
+
+PIPELINE_QUEUE_SIZE = 256         # raw notifications buffered before the oldest is dropped
+PIPELINE_BATCH_SIZE = 32          # notifications decoded per consumer pass
+PIPELINE_WORKER_THREAD = False    # run decoding/detection on a worker thread
+PIPELINE_RESTART_DELAY = 1.0      # seconds before a crashed consumer is restarted
+
+RECONNECT_INITIAL_DELAY = 1.0     # seconds; doubles after each failed attempt
+RECONNECT_MAX_DELAY = 30.0        # seconds
+THROUGHPUT_REPORT_INTERVAL = 10.0 # seconds between aggregate throughput logs
 
 SERVICE_UUID = "00000000-0004-11e1-9ab4-0002a5d5c51b"
 CHARACTERISTIC_01 = "00000001-0004-11e1-ac36-0002a5d5c51b"  # Notify